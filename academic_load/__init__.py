@@ -0,0 +1 @@
+"""Data layer behind the KIMEP Academic Load Intelligence dashboard."""
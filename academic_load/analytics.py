@@ -0,0 +1,301 @@
+"""Dashboard analytics as a single, cacheable computation.
+
+``compute`` turns the cleaned schedule, its FilterIndex and a FilterSpec
+into every number and table the dashboard renders. It runs in two steps:
+``aggregate`` takes the matching rows once and rolls each dimension up once,
+keeping the rankings whole, and ``rank`` cuts them to the Top N.
+``AnalyticsEngine`` memoizes the aggregates of a query backend (see
+``backends``; ``aggregate`` is the pandas one) in a size-bounded LRU keyed
+by ``spec``, so repeated filter combinations are served from memory across
+reruns and sessions and a Top N change only re-ranks.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .topk import top_per_group, top_positions, top_series
+
+SUNBURST_FACULTIES = 5
+SUNBURST_INSTRUCTORS = 3
+
+# Heatmap bins, as in the original dashboard: [8.5, 9.5], (9.5, 10.5], ...
+HOUR_BIN_EDGES = np.arange(8.5, 22.0, 1.0)
+# Bin labels as pd.cut(...).astype(str) spells them, with "nan" for hours
+# outside every bin. Sorted, so the heatmap keeps its string column order.
+_BIN_LABELS = [*pd.cut(np.array([]), HOUR_BIN_EDGES, include_lowest=True).categories.astype(str), "nan"]
+HOUR_BINS = sorted(_BIN_LABELS)
+_BIN_CODES = np.array([HOUR_BINS.index(label) for label in _BIN_LABELS])
+
+PANEL_COLUMNS = ["instructor", "hall", "department", "days", "course_title", "minutes"]
+
+
+class DashboardAnalytics(NamedTuple):
+    matched: bool
+    sessions: int
+    unique_courses: int
+    active_instructors: int
+    total_minutes: int
+    top_instructor: str
+    top_instructor_minutes: float
+    avg_instructor_minutes: float
+    pct_above_avg: float
+    peak: Optional[Tuple[str, int, int]]
+    top_hall: str
+    top_hall_minutes: float
+    instructor_load: pd.DataFrame
+    hall_usage: pd.DataFrame
+    heatmap: pd.DataFrame
+    sunburst: pd.DataFrame
+    popular_courses: pd.DataFrame
+    course_minutes: pd.DataFrame
+    faculty_share: pd.DataFrame
+
+
+class PanelAggregates(NamedTuple):
+    """What one filter selection contributes to every panel, before the Top N cut."""
+    matched: bool
+    sessions: int
+    unique_courses: int
+    active_instructors: int
+    total_minutes: int
+    peak: Optional[Tuple[str, int, int]]
+    heatmap: pd.DataFrame
+    sunburst: pd.DataFrame
+    instructor_minutes: pd.Series
+    hall_minutes: pd.Series
+    department_minutes: pd.Series
+    course_sessions: pd.Series
+    course_minutes: pd.Series
+
+
+def get_last_name(full_name):
+    if pd.isna(full_name) or str(full_name).strip() == "":
+        return "Unknown"
+    name = str(full_name).strip()
+    if "," in name:
+        return name.split(",")[0].strip()
+    else:
+        parts = name.split()
+        return parts[-1] if parts else name
+
+
+def hour_bins(hours):
+    """Heatmap bin label of every start hour (NaN when the hour is missing)."""
+    hours = np.asarray(hours, dtype=np.float64)
+    i = np.searchsorted(HOUR_BIN_EDGES, hours, side="left") - 1
+    i[hours == HOUR_BIN_EDGES[0]] = 0
+    i[(i < 0) | (i >= len(_BIN_LABELS) - 1)] = len(_BIN_LABELS) - 1
+    codes = _BIN_CODES[i]
+    codes[np.isnan(hours)] = -1
+    return pd.Categorical.from_codes(codes, categories=HOUR_BINS)
+
+
+def rollup(cells, by, value="minutes"):
+    """Sum ``value`` over the given dimension(s); empty groups are dropped."""
+    return cells.groupby(by, observed=True)[value].sum()
+
+
+def distinct(cells, dim):
+    return cells[dim].nunique()
+
+
+def coverage(df):
+    """Whole-dataset counts for the data coverage card."""
+    return {
+        "sessions": len(df),
+        "faculties": distinct(df, "department"),
+        "courses": distinct(df, "course_title"),
+        "instructors": distinct(df, "instructor"),
+    }
+
+
+def _leader(series):
+    top = top_positions(series.to_numpy(), 1)
+    if len(top) == 0:
+        return "N/A", 0
+    return series.index[top[0]], series.iloc[top[0]]
+
+
+def panel_rows(df, rows=None):
+    """The columns the panels roll up, for ``rows`` of the cleaned schedule.
+
+    Adds ``sessions`` (1 per row), ``hour_slot`` and ``hour_bin``.
+    """
+    if rows is not None and len(rows) < len(df):
+        df = df.iloc[rows]
+    hours = df["start_hour"]
+    return df[PANEL_COLUMNS].assign(sessions=1, hour_slot=hours // 1, hour_bin=hour_bins(hours))
+
+
+def aggregate(df, index, spec):
+    """Every rollup the dashboard needs for one filter selection of ``df``.
+
+    ``index`` is the FilterIndex of ``df``. When nothing matches, the whole
+    dataset is used and ``matched`` is False, mirroring the dashboard's
+    fallback. Rankings are kept whole; ``rank`` cuts them to a Top N.
+    """
+    rows = index.select(spec)
+    matched = len(rows) > 0
+    cells = panel_rows(df, rows if matched else None)
+
+    dept_minutes = rollup(cells, "department")
+    slot_sessions = rollup(cells, ["days", "hour_slot"], "sessions")
+    peak = None
+    if not slot_sessions.empty:
+        (peak_day, peak_hour), peak_count = _leader(slot_sessions)
+        peak = (peak_day, int(peak_hour), int(peak_count))
+
+    heatmap = rollup(cells, ["days", "hour_bin"], "sessions").reset_index(name="count")
+
+    top_depts = top_series(dept_minutes, SUNBURST_FACULTIES)["department"].tolist()
+    sb_df = rollup(cells[cells["department"].isin(top_depts)], ["department", "instructor"]).reset_index()
+    # Faculty rank (by minutes) of every row, then the top instructors of each in one pass.
+    dept_rank = pd.Index(top_depts).get_indexer(sb_df["department"].astype(object))
+    sunburst = sb_df.iloc[top_per_group(dept_rank, sb_df["minutes"].to_numpy(), SUNBURST_INSTRUCTORS)]
+    sunburst = sunburst.reset_index(drop=True)
+    # Map the few sunburst rows, not every instructor category.
+    sunburst["instructor_short"] = sunburst["instructor"].astype(object).map(get_last_name)
+
+    return PanelAggregates(
+        matched=matched,
+        sessions=int(cells["sessions"].sum()),
+        unique_courses=distinct(cells, "course_title"),
+        active_instructors=distinct(cells, "instructor"),
+        total_minutes=int(cells["minutes"].sum()),
+        peak=peak,
+        heatmap=heatmap,
+        sunburst=sunburst,
+        instructor_minutes=rollup(cells, "instructor"),
+        hall_minutes=rollup(cells, "hall"),
+        department_minutes=dept_minutes,
+        course_sessions=rollup(cells, "course_title", "sessions"),
+        course_minutes=rollup(cells, "course_title"),
+    )
+
+
+def rank(agg, top_n=10):
+    """The dashboard's numbers and tables from ``aggregate``'s rollups, rankings cut to ``top_n``."""
+    inst_minutes, hall_minutes = agg.instructor_minutes, agg.hall_minutes
+    avg_minutes = inst_minutes.mean()
+    top_instructor, top_instructor_minutes = _leader(inst_minutes)
+    pct_above_avg = ((top_instructor_minutes - avg_minutes) / avg_minutes * 100) if avg_minutes > 0 else 0
+    top_hall, top_hall_minutes = _leader(hall_minutes)
+
+    return DashboardAnalytics(
+        matched=agg.matched,
+        sessions=agg.sessions,
+        unique_courses=agg.unique_courses,
+        active_instructors=agg.active_instructors,
+        total_minutes=agg.total_minutes,
+        top_instructor=top_instructor,
+        top_instructor_minutes=top_instructor_minutes,
+        avg_instructor_minutes=avg_minutes,
+        pct_above_avg=pct_above_avg,
+        peak=agg.peak,
+        top_hall=top_hall,
+        top_hall_minutes=top_hall_minutes,
+        instructor_load=top_series(inst_minutes, top_n),
+        hall_usage=top_series(hall_minutes, top_n),
+        heatmap=agg.heatmap,
+        sunburst=agg.sunburst,
+        popular_courses=top_series(agg.course_sessions, top_n, "count"),
+        course_minutes=top_series(agg.course_minutes, top_n),
+        faculty_share=top_series(agg.department_minutes.drop(["Other", "Unknown"], errors="ignore"), top_n),
+    )
+
+
+def compute(df, index, spec, top_n=10):
+    """Every KPI and chart table for one filter selection: ``aggregate`` then ``rank``."""
+    return rank(aggregate(df, index, spec), top_n)
+
+
+def _values_bytes(values):
+    # Category labels are shared with the schedule table; only the codes are new.
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return pd.Categorical(values).codes.nbytes
+    if isinstance(values, pd.Index):
+        return values.memory_usage(deep=True)
+    return values.memory_usage(index=False, deep=True)
+
+
+def result_size(result):
+    """Approximate bytes held by a result (frames and rollups measured deeply)."""
+    size = sys.getsizeof(result)
+    for value in result:
+        if isinstance(value, pd.DataFrame):
+            size += _values_bytes(value.index) + sum(_values_bytes(value[col]) for col in value.columns)
+        elif isinstance(value, pd.Series):
+            size += _values_bytes(value.index) + _values_bytes(value)
+        else:
+            size += sys.getsizeof(value)
+    return int(size)
+
+
+class AnalyticsEngine:
+    """A query backend's aggregates behind a thread-safe LRU bounded by total bytes."""
+
+    def __init__(self, backend, max_bytes=64 * 1024 * 1024):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def query(self, spec, top_n=10):
+        return rank(self.aggregates(spec), top_n)
+
+    def aggregates(self, spec):
+        key = spec
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        result = self.backend.aggregate(spec)
+        size = result_size(result)
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (result, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self.evictions += 1
+        return result
+
+    def carry(self, backend, unchanged):
+        """A new engine over ``backend`` keeping the cached specs for which ``unchanged(spec)`` holds.
+
+        Used after a row delta: aggregates of a selection none of the
+        changed rows belong to are the same in the new table.
+        """
+        out = AnalyticsEngine(backend, self.max_bytes)
+        with self._lock:
+            entries = list(self._entries.items())
+        for spec, entry in entries:
+            if unchanged(spec):
+                out._entries[spec] = entry
+                out._bytes += entry[1]
+        return out
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "backend": self.backend.name,
+            }
@@ -0,0 +1,304 @@
+"""Multi-term schedule archive: chunked ingestion of many files into one store.
+
+    python -m academic_load.archive add PATH [PATH ...] --store archive [--term NAME]
+    python -m academic_load.archive list --store archive
+
+``ingest`` accepts files and directories of ``.xlsx``, ``.csv`` and
+``.parquet`` schedules, every sheet of each workbook. Each source is
+streamed ``CHUNK_ROWS`` rows at a time (openpyxl read-only mode, CSV and
+Parquet batch readers), each chunk goes through the dashboard's cleaning
+rules, is tagged with a ``term`` and appended as a row group to one Parquet
+fragment per source sheet. ``manifest.json`` records every fragment with its
+term and the source's size, mtime and SHA-256, so peak memory is one chunk
+whatever the archive size, and adding a term never re-reads the others:
+unchanged sources are skipped and a changed source only replaces its own
+fragments. ``read_store`` loads some or all terms in the compact schema.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .cleaning import CLEANING_VERSION, VALID_DAYS, clean_schedule
+from .schema import LABEL_COLUMNS, SCHEMA_VERSION, compact_schedule
+
+# The dashboard reads terms from this store instead of the workbook when set.
+ARCHIVE_ENV = "SCHEDULE_ARCHIVE"
+
+ARCHIVE_FORMATS = (".xlsx", ".xlsm", ".csv", ".parquet")
+CHUNK_ROWS = 50_000
+MANIFEST = "manifest.json"
+
+# Store type per cleaned column; anything else is kept as a string.
+STORE_TYPES = {
+    "minutes": pa.int16(),
+    "start_hour": pa.float32(),
+    "day_code": pa.uint8(),
+    "limit": pa.float64(),
+    "start_date": pa.timestamp("ns"),
+    "end_date": pa.timestamp("ns"),
+}
+# Read back as dictionaries, i.e. straight into categoricals.
+DICTIONARY_COLUMNS = (*LABEL_COLUMNS, "days", "term")
+
+
+def expand_sources(paths):
+    """Files to ingest, in order: directories are walked, Excel lock files skipped."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files += [os.path.join(root, n) for n in sorted(names)
+                          if n.lower().endswith(ARCHIVE_FORMATS) and not n.startswith("~$")]
+        elif path.lower().endswith(ARCHIVE_FORMATS):
+            files.append(path)
+        else:
+            raise ValueError(f"unsupported schedule file: {path}")
+    return files
+
+
+def _frames(rows, columns, chunk_rows):
+    while True:
+        batch = list(itertools.islice(rows, chunk_rows))
+        if not batch:
+            return
+        frame = pd.DataFrame.from_records(batch, columns=columns)
+        # Blank cells come back as None; read_excel gives NaN.
+        text = frame.columns[frame.dtypes == object]
+        frame[text] = frame[text].fillna(np.nan)
+        yield frame
+
+
+def _excel_sheets(path, chunk_rows):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    single = len(wb.worksheets) == 1
+    try:
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            columns = [f"Unnamed: {i}" if h is None else str(h) for i, h in enumerate(header)]
+            nonblank = (r for r in rows if any(v is not None for v in r))
+            yield None if single else ws.title, _frames(nonblank, columns, chunk_rows)
+    finally:
+        wb.close()
+
+
+def iter_sheets(path, chunk_rows=CHUNK_ROWS):
+    """Yield ``(sheet, chunks)`` per sheet of ``path``.
+
+    ``sheet`` is None for CSV, Parquet and single-sheet workbooks. Consume
+    each sheet's chunks before moving on to the next sheet.
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".csv":
+        yield None, pd.read_csv(path, chunksize=chunk_rows)
+    elif suffix == ".parquet":
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_rows)
+        yield None, (batch.to_pandas() for batch in batches)
+    else:
+        yield from _excel_sheets(path, chunk_rows)
+
+
+def file_digest(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for data in iter(lambda: fh.read(block), b""):
+            h.update(data)
+    return h.hexdigest()
+
+
+def _slug(text):
+    return re.sub(r"[^\w.-]+", "_", text).strip("_") or "term"
+
+
+def store_table(df, term):
+    """A cleaned chunk as an Arrow table with the store's fixed column types."""
+    df = compact_schedule(df)
+    arrays, names = [], []
+    for col in df.columns:
+        typ = STORE_TYPES.get(col, pa.string())
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        if pa.types.is_string(typ):
+            values = values.where(values.isna(), values.astype(str))
+        elif pa.types.is_timestamp(typ):
+            values = pd.to_datetime(values, errors="coerce")
+        elif pa.types.is_floating(typ):
+            values = pd.to_numeric(values, errors="coerce")
+        arrays.append(pa.array(values, type=typ, from_pandas=True))
+        names.append(col)
+    arrays.append(pa.array(np.full(len(df), term, dtype=object), type=pa.string()))
+    names.append("term")
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {"fragments": []}
+
+
+def _write_manifest(store_dir, manifest):
+    fd, tmp = tempfile.mkstemp(dir=store_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(tmp, os.path.join(store_dir, MANIFEST))
+
+
+def _ingest_sheet(chunks, term, path):
+    """Stream ``chunks`` into a Parquet file at ``path``; returns (raw rows, stored rows)."""
+    writer, raw_rows, rows = None, 0, 0
+    tmp = path + ".tmp"
+    try:
+        for chunk in chunks:
+            raw_rows += len(chunk)
+            table = store_table(clean_schedule(chunk), term)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += table.num_rows
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if writer is None:
+        return raw_rows, 0
+    writer.close()
+    os.replace(tmp, path)
+    return raw_rows, rows
+
+
+def ingest(paths, store_dir, term=None, chunk_rows=CHUNK_ROWS, log=print):
+    """Add schedule files to the store; returns the manifest entries written this run.
+
+    Without ``term`` each file (or each sheet, for multi-sheet workbooks) is
+    its own term, named after the file and sheet.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = read_manifest(store_dir)
+    version = f"{CLEANING_VERSION}.{SCHEMA_VERSION}"
+    added = []
+    for source in expand_sources(paths):
+        source = os.path.abspath(source)
+        stat = os.stat(source)
+        current = [f for f in manifest["fragments"] if f["source"] == source]
+        if current and all(f["version"] == version for f in current):
+            if all((f["size"], f["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns) for f in current):
+                continue
+            digest = file_digest(source)
+            if all(f["sha256"] == digest for f in current):
+                continue
+        else:
+            digest = file_digest(source)
+
+        t0 = time.perf_counter()
+        stem = os.path.splitext(os.path.basename(source))[0]
+        fragments = []
+        for sheet, chunks in iter_sheets(source, chunk_rows):
+            name = term or (stem if sheet is None else f"{stem} {sheet}")
+            origin = hashlib.sha256(source.encode("utf-8")).hexdigest()[:8]
+            file = f"{_slug(name)}--{origin}{digest[:12]}{'-' + _slug(sheet) if sheet else ''}.parquet"
+            raw_rows, rows = _ingest_sheet(chunks, name, os.path.join(store_dir, file))
+            if rows:
+                fragments.append({
+                    "file": file, "term": name, "source": source, "sheet": sheet,
+                    "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest,
+                    "version": version, "raw_rows": raw_rows, "rows": rows,
+                })
+
+        for old in current:
+            if old["file"] not in {f["file"] for f in fragments}:
+                stale = os.path.join(store_dir, old["file"])
+                if os.path.exists(stale):
+                    os.remove(stale)
+        manifest["fragments"] = [f for f in manifest["fragments"] if f["source"] != source] + fragments
+        _write_manifest(store_dir, manifest)
+        added += fragments
+        rows = sum(f["rows"] for f in fragments)
+        log(f"{source}: {rows} sessions in {len(fragments)} term(s) ({time.perf_counter() - t0:.2f}s)")
+    return added
+
+
+def store_version(store_dir):
+    """Changes whenever the store's manifest is rewritten."""
+    try:
+        return os.stat(os.path.join(store_dir, MANIFEST)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def list_terms(store_dir):
+    """Terms in the store with their session counts, in ingestion order."""
+    counts = {}
+    for f in read_manifest(store_dir)["fragments"]:
+        counts[f["term"]] = counts.get(f["term"], 0) + f["rows"]
+    return counts
+
+
+def read_store(store_dir, terms=None, columns=None):
+    """Load the given terms (default: all) as one compact frame, or None if there are none."""
+    wanted = None if terms is None else set(terms)
+    files = [os.path.join(store_dir, f["file"]) for f in read_manifest(store_dir)["fragments"]
+             if wanted is None or f["term"] in wanted]
+    if not files:
+        return None
+    tables = []
+    for path in files:
+        names = pq.read_schema(path).names
+        cols = None if columns is None else [c for c in columns if c in names]
+        dictionary = [c for c in DICTIONARY_COLUMNS if c in names]
+        tables.append(pq.read_table(path, columns=cols, read_dictionary=dictionary, memory_map=True))
+    df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+    for col in (*LABEL_COLUMNS, "term"):
+        if col in df.columns:
+            df[col] = df[col].cat.set_categories(sorted(df[col].cat.categories))
+    if "days" in df.columns:
+        df["days"] = pd.Categorical(df["days"], categories=VALID_DAYS)
+    return compact_schedule(df) if columns is None else df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="ingest schedule files or folders")
+    add.add_argument("paths", nargs="+")
+    add.add_argument("--store", default="archive")
+    add.add_argument("--term", help="put every source under this term")
+    add.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    show = sub.add_parser("list", help="list the terms in a store")
+    show.add_argument("--store", default="archive")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        try:
+            ingest(args.paths, args.store, args.term, args.chunk_rows)
+        except ValueError as exc:
+            parser.error(str(exc))
+    for term, rows in list_terms(args.store).items():
+        print(f"{term}\t{rows}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Query backends: a FilterSpec in, the dashboard's aggregate tables out.
+
+Every backend answers ``aggregate(spec)`` with the same ``PanelAggregates``
+that ``analytics.aggregate`` returns, plus ``coverage()`` and ``len()``
+(number of schedule rows), so ``AnalyticsEngine`` and the dashboard do not
+care which one runs. ``SCHEDULE_BACKEND`` picks it; ``pandas``
+(``aggregate`` over the in-memory table) is the only one so far.
+
+A file-backed SQL engine only pays off once the schedule no longer fits in
+memory, and the conflict, occupancy, calendar, rebalancing and export panels
+all read the in-memory table anyway, so there is none here yet.
+"""
+import os
+
+from .analytics import aggregate, coverage
+
+BACKEND_ENV = "SCHEDULE_BACKEND"
+
+
+class PandasBackend:
+    name = "pandas"
+
+    def __init__(self, df, index):
+        self.df = df
+        self.index = index
+
+    def __len__(self):
+        return len(self.df)
+
+    def aggregate(self, spec):
+        return aggregate(self.df, self.index, spec)
+
+    def coverage(self):
+        return coverage(self.df)
+
+
+BACKENDS = {"pandas": PandasBackend}
+
+
+def make_backend(df, index, kind=None):
+    """The backend named by ``kind`` (default: ``SCHEDULE_BACKEND``, else pandas) over ``df``."""
+    kind = kind or os.environ.get(BACKEND_ENV, "pandas")
+    if kind not in BACKENDS:
+        raise ValueError(f"unknown {BACKEND_ENV} {kind!r}; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[kind](df, index)
@@ -0,0 +1,202 @@
+"""Headless batch reports: the dashboard's KPIs and top-N tables for many filters.
+
+    python -m academic_load.batch [workbook.xlsx] --each faculty --each hall \\
+        [--specs specs.json] [--top-n 10] [--workers N] [--format parquet|csv] [--out reports]
+
+Jobs are fanned out over a ProcessPoolExecutor. Every worker loads the same
+on-disk Arrow cache of the cleaned schedule instead of having the frame
+pickled to it; the file is read through the shared page cache, but each
+worker converts it into its own pandas copy.
+Instructor and hall names go through the alias map (see ``names``), which
+the parent process brings up to date before the workers start.
+The run writes ``summary.<fmt>`` (one row per job, with its timing) and
+``top_tables.<fmt>`` (every top-N table in long form) to the output folder.
+
+A specs file is a JSON list of objects with optional ``name``,
+``instructors``, ``faculties``, ``halls``, ``days``, ``hour_range`` and
+``dates`` (ISO first and last day) keys. Like the dashboard's sidebar, every
+job starts from the default hour range; give ``"hour_range": null`` in a
+spec to count sessions at any time of day.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .analytics import compute
+from .cache import cache_key, cache_path, load_and_clean, read_mapped, source_bytes
+from .filter_index import HOUR_RANGE, FilterIndex, make_spec
+from .names import aliases_path, canonicalize, resolve_aliases
+
+TOP_TABLES = ("instructor_load", "hall_usage", "popular_courses", "course_minutes", "faculty_share")
+
+# --each choice -> (FilterSpec field, cleaned column)
+EACH = {
+    "faculty": ("faculties", "department"),
+    "hall": ("halls", "hall"),
+    "instructor": ("instructors", "instructor"),
+}
+
+_TABLE = None
+
+
+def _init_worker(cached, source, aliases):
+    global _TABLE
+    df = read_mapped(cached) if cached else load_and_clean(source)
+    df = canonicalize(df, aliases)
+    _TABLE = df, FilterIndex(df)
+
+
+def _run_job(job):
+    name, spec, top_n = job
+    t0 = time.perf_counter()
+    res = compute(*_TABLE, spec, top_n)
+    seconds = time.perf_counter() - t0
+    return name, spec, res, seconds
+
+
+def specs_from_file(path):
+    with open(path, encoding="utf-8") as fh:
+        entries = json.load(fh)
+    jobs = []
+    for i, entry in enumerate(entries):
+        entry = dict(entry)
+        name = entry.pop("name", f"spec-{i + 1}")
+        entry.setdefault("hour_range", HOUR_RANGE)
+        jobs.append((name, make_spec(**entry)))
+    return jobs
+
+
+def specs_for_each(df, choice):
+    field, column = EACH[choice]
+    values = sorted(set(df[column].dropna().astype(str)) - {"Unknown"})
+    return [(f"{choice}: {v}", make_spec(**{field: [v]}, hour_range=HOUR_RANGE)) for v in values]
+
+
+def summary_row(name, spec, res, seconds):
+    peak = f"{res.peak[0]} {res.peak[1]:02d}:00 ({res.peak[2]} sessions)" if res.peak else "N/A"
+    return {
+        "job": name,
+        "instructors": "; ".join(spec.instructors),
+        "faculties": "; ".join(spec.faculties),
+        "halls": "; ".join(spec.halls),
+        "days": "; ".join(spec.days),
+        "hour_range": "" if spec.hour_range is None else f"{spec.hour_range[0]}-{spec.hour_range[1]}",
+        "dates": "" if spec.dates is None else f"{spec.dates[0]}..{spec.dates[1]}",
+        "matched": res.matched,
+        "sessions": res.sessions,
+        "unique_courses": res.unique_courses,
+        "active_instructors": res.active_instructors,
+        "total_hours": res.total_minutes / 60,
+        "top_instructor": str(res.top_instructor),
+        "top_instructor_hours": res.top_instructor_minutes / 60,
+        "pct_above_avg": res.pct_above_avg,
+        "peak_slot": peak,
+        "top_hall": str(res.top_hall),
+        "top_hall_hours": res.top_hall_minutes / 60,
+        "seconds": seconds,
+    }
+
+
+def top_table_rows(name, res):
+    frames = []
+    for table in TOP_TABLES:
+        frame = getattr(res, table)
+        label, value = frame.columns[0], frame.columns[1]
+        frames.append(pd.DataFrame({
+            "job": name,
+            "table": table,
+            "rank": range(1, len(frame) + 1),
+            "label": frame[label].astype(str).to_numpy(),
+            "value": frame[value].to_numpy(),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_bundle(out_dir, fmt, summary, tables):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for stem, frame in (("summary", summary), ("top_tables", tables)):
+        path = os.path.join(out_dir, f"{stem}.{fmt}")
+        if fmt == "parquet":
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def run(source, jobs, top_n=10, workers=None, out_dir="reports", fmt="parquet", aliases=None):
+    """Run every (name, FilterSpec) job and write the bundle; returns the summary frame.
+
+    ``aliases`` is the alias map already resolved for ``source``; without it
+    the schedule is loaded and its aliases resolved here.
+    """
+    if aliases is None:
+        df = load_and_clean(source)
+        if df is None:
+            raise SystemExit(f"Could not read {source}")
+        aliases, _ = resolve_aliases(df, aliases_path(source))
+    cached = cache_path(cache_key(source_bytes(source)))
+    cached = cached if os.path.exists(cached) else None
+
+    t0 = time.perf_counter()
+    rows, tables = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cached, source, aliases)) as pool:
+        for name, spec, res, seconds in pool.map(_run_job, [(n, s, top_n) for n, s in jobs], chunksize=8):
+            rows.append(summary_row(name, spec, res, seconds))
+            tables.append(top_table_rows(name, res))
+    wall = time.perf_counter() - t0
+
+    summary = pd.DataFrame(rows)
+    top = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+    paths = write_bundle(out_dir, fmt, summary, top)
+
+    if len(summary):
+        secs = summary["seconds"]
+        print(f"{len(summary)} jobs in {wall:.2f}s wall "
+              f"(per job: min {secs.min() * 1000:.1f} ms, median {statistics.median(secs) * 1000:.1f} ms, "
+              f"max {secs.max() * 1000:.1f} ms)")
+    for path in paths:
+        print(f"wrote {path}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", default="cleaned_schedule.xlsx")
+    parser.add_argument("--specs", help="JSON file with a list of filter specs")
+    parser.add_argument("--each", action="append", choices=sorted(EACH), default=[],
+                        help="add one job per faculty, hall or instructor (repeatable)")
+    parser.add_argument("--no-overall", action="store_true", help="skip the unfiltered job")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--out", default="reports")
+    args = parser.parse_args(argv)
+
+    df = load_and_clean(args.source)
+    if df is None:
+        parser.error(f"could not read {args.source}")
+    aliases, _ = resolve_aliases(df, aliases_path(args.source))
+    df = canonicalize(df, aliases)
+
+    jobs = [] if args.no_overall else [("all", make_spec(hour_range=HOUR_RANGE))]
+    if args.specs:
+        jobs += specs_from_file(args.specs)
+    for choice in args.each:
+        jobs += specs_for_each(df, choice)
+    if not jobs:
+        parser.error("no jobs: pass --specs or --each, or drop --no-overall")
+
+    run(args.source, jobs, args.top_n, args.workers, args.out, args.format, aliases)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
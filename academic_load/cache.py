@@ -0,0 +1,147 @@
+"""On-disk columnar cache of the cleaned schedule.
+
+The cleaned frame is stored as an uncompressed Arrow IPC (Feather v2) file
+keyed by the SHA-256 of the source workbook, ``CLEANING_VERSION`` and
+``SCHEMA_VERSION``. Cache files are written atomically, so a restart only
+re-parses the workbook when the file or the cleaning rules change.
+``read_mapped`` opens the file through a memory map but then converts it
+with ``to_pandas``, which copies every column into process memory: the map
+saves parsing and decoding, not RAM. ``ScheduleStore`` (see
+``incremental``) also keeps a ``.rows.npy`` sidecar of raw-row fingerprints
+next to each frame so edits can be diffed, and a ``.names.json`` sidecar
+with the frame's resolved name aliases so a restart does not re-cluster them.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from .cleaning import CLEANING_VERSION, clean_schedule, read_schedule
+from .schema import SCHEMA_VERSION, compact_schedule
+
+CACHE_DIR = os.environ.get("SCHEDULE_CACHE_DIR", ".schedule_cache")
+
+
+def source_bytes(source):
+    """Return the raw bytes of a path or an uploaded file object."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "read"):
+        data = source.read()
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return data
+    with open(source, "rb") as fh:
+        return fh.read()
+
+
+def cache_key(data):
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{digest[:32]}-v{CLEANING_VERSION}.{SCHEMA_VERSION}"
+
+
+def cache_path(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f"schedule-{key}.arrow")
+
+
+def rows_path(key, cache_dir=None):
+    """Sidecar holding the raw-row fingerprints behind the cached frame ``key``."""
+    return os.path.join(cache_dir or CACHE_DIR, f"schedule-{key}.rows.npy")
+
+
+def names_path(key, cache_dir=None):
+    """Sidecar holding the name aliases resolved for the cached frame ``key``."""
+    return os.path.join(cache_dir or CACHE_DIR, f"schedule-{key}.names.json")
+
+
+def _replace_atomic(path, write):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_atomic(df, path):
+    """Write ``df`` to ``path`` via a temp file + rename so readers never see a partial file."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    _replace_atomic(path, lambda tmp: feather.write_feather(table, tmp, compression="uncompressed"))
+
+
+def read_mapped(path):
+    table = feather.read_table(path, memory_map=True)
+    return table.to_pandas()
+
+
+def write_rows(keys, positions, path):
+    """Store per-raw-row fingerprints and cleaned-row positions (-1 = dropped)."""
+    arr = np.stack([keys.view(np.int64), positions.astype(np.int64)])
+
+    def write(tmp):
+        with open(tmp, "wb") as fh:
+            np.save(fh, arr)
+    _replace_atomic(path, write)
+
+
+def read_rows(path):
+    arr = np.load(path)
+    return arr[0].view(np.uint64), arr[1]
+
+
+def write_names(data, review, path):
+    """Store a ``names.resolve_aliases`` result: the alias structure and the review frame."""
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"aliases": data, "review": review.to_dict("list")}, fh, ensure_ascii=False)
+    _replace_atomic(path, write)
+
+
+def read_names(path):
+    with open(path, encoding="utf-8") as fh:
+        stored = json.load(fh)
+    return stored["aliases"], pd.DataFrame(stored["review"])
+
+
+def load_and_clean(source="cleaned_schedule.xlsx", cache_dir=None):
+    """Return the cleaned, compacted schedule, using the on-disk cache when it is current.
+
+    Returns ``None`` when the source cannot be read, matching the dashboard's
+    upload fallback.
+    """
+    try:
+        data = source_bytes(source)
+    except Exception:
+        return None
+
+    path = cache_path(cache_key(data), cache_dir)
+    if os.path.exists(path):
+        try:
+            return read_mapped(path)
+        except Exception:
+            pass
+
+    try:
+        raw = read_schedule(io.BytesIO(data))
+    except Exception:
+        return None
+    df = compact_schedule(clean_schedule(raw))
+
+    try:
+        write_atomic(df, path)
+    except OSError:
+        pass
+    return df
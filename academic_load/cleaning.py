@@ -0,0 +1,175 @@
+"""Cleaning rules that turn the raw schedule workbook into the session table."""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Bump whenever the output of clean_schedule changes so on-disk caches built
+# with older rules are ignored.
+CLEANING_VERSION = 1
+
+
+def read_schedule(source):
+    """Read the raw workbook from a path, bytes or file-like object."""
+    return pd.read_excel(source)
+
+
+VALID_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+DAY_NAMES = {d: d for d in VALID_DAYS}
+DAY_ABBREVIATIONS = {"M": "Mon", "T": "Tue", "W": "Wed", "R": "Thu", "F": "Fri", "S": "Sat", "Su": "Sun"}
+
+FACULTY_MAP = {
+    "ACC": "Bang College of Business",
+    "BUS": "Bang College of Business",
+    "FIN": "Bang College of Business",
+    "MGT": "Bang College of Business",
+    "MKT": "Bang College of Business",
+    "OPM": "Bang College of Business",
+    "IFS": "Bang College of Business",
+    "EBA": "Bang College of Business",
+    "MM": "Bang College of Business",
+    "ECN": "College of Social Sciences",
+    "IRL": "College of Social Sciences",
+    "POL": "College of Social Sciences",
+    "PAD": "College of Social Sciences",
+    "PAF": "College of Social Sciences",
+    "SOC": "College of Social Sciences",
+    "CSS": "College of Social Sciences",
+    "GEN": "College of Social Sciences",
+    "JMC": "College of Human Sciences & Education",
+    "PSY": "College of Human Sciences & Education",
+    "EPM": "College of Human Sciences & Education",
+    "TFL": "College of Human Sciences & Education",
+    "TRN": "College of Human Sciences & Education",
+    "LING": "College of Human Sciences & Education",
+    "COGN": "College of Human Sciences & Education",
+    "ENG": "College of Human Sciences & Education",
+    "KAZ": "College of Human Sciences & Education",
+    "RUS": "College of Human Sciences & Education",
+    "CHN": "College of Human Sciences & Education",
+    "GER": "College of Human Sciences & Education",
+    "KOR": "College of Human Sciences & Education",
+    "LDP": "College of Human Sciences & Education",
+    "FOP": "College of Human Sciences & Education",
+    "LAW": "Law School",
+    "CIT": "School of Computer Science & Mathematics",
+    "CLP": "School of Computer Science & Mathematics",
+    "SCS": "School of Computer Science & Mathematics",
+    "MATH": "School of Computer Science & Mathematics",
+}
+
+EXPECTED_COLUMNS = {
+    "course_title": "", "code": "", "class_dates": "", "class_times": "",
+    "days": "", "hall": "", "instructor": "", "minutes": 0,
+    "start_time": "", "end_time": "", "department": ""
+}
+
+_CODE_PREFIX = re.compile(r"^([A-Z]+)")
+_CLOCK = re.compile(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$")
+
+
+def normalize_days(days):
+    """Map day labels to Mon..Sun; unrecognised labels become NaN."""
+    s = days.astype(str).str.strip()
+    out = s.str.capitalize().map(DAY_NAMES)
+    return out.fillna(s.map(DAY_ABBREVIATIONS)).where(days.notna())
+
+
+def _parse_clock_scalar(x):
+    try:
+        t = pd.to_datetime(str(x), errors="coerce")
+        if pd.isna(t):
+            return np.nan
+        return t.hour + t.minute / 60.0
+    except Exception:
+        return np.nan
+
+
+def parse_clock_hours(values):
+    """Parse clock values into fractional hours (13:30 -> 13.5).
+
+    Plain ``HH:MM[:SS]`` strings are parsed with one vectorized extract; any
+    other spelling falls back to ``pd.to_datetime`` once per distinct value.
+    """
+    s = values.astype(str)
+    parts = s.str.extract(_CLOCK).astype(float)
+    hour, minute, second = parts[0], parts[1], parts[2]
+    ok = (hour < 24) & (minute < 60) & ~(second >= 60)
+    hours = (hour + minute / 60.0).where(ok)
+
+    rest = ~ok
+    if rest.any():
+        odd = s[rest]
+        parsed = {v: _parse_clock_scalar(v) for v in odd.unique()}
+        hours[rest] = odd.map(parsed).astype(float)
+    return hours
+
+
+def clock_minutes(values):
+    """Minute of day (float, NaN when unparseable) for a clock column.
+
+    Categorical columns are parsed once per category.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = pd.Series(values.cat.categories)
+        parsed = np.append(np.round(parse_clock_hours(categories).to_numpy() * 60), np.nan)
+        codes = values.cat.codes.to_numpy()
+        return parsed[np.where(codes < 0, len(categories), codes)]
+    return np.round(parse_clock_hours(values).to_numpy() * 60)
+
+
+def extract_faculty(codes):
+    """Map course codes to faculties via their leading upper-case prefix."""
+    s = codes.astype(str).str.strip()
+    prefix = s.str.extract(_CODE_PREFIX, expand=False)
+    faculty = prefix.map(FACULTY_MAP).fillna("Other")
+    return faculty.mask(prefix.isna() | codes.isna(), "Unknown")
+
+
+def clean_labels(values):
+    return values.astype(str).replace({"nan": ""}).str.strip().replace({"": "Unknown"})
+
+
+def clean_schedule(df, keep_index=False):
+    """Normalize a raw workbook frame; rows without a valid day are dropped.
+
+    With ``keep_index`` the surviving rows keep their original index labels,
+    so callers cleaning a subset can tell which input rows were kept.
+    """
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip().str.replace(r"\s+", "_", regex=True).str.lower()
+    
+    for k, v in EXPECTED_COLUMNS.items():
+        if k not in df.columns:
+            df[k] = v
+    
+    df["minutes"] = pd.to_numeric(df["minutes"], errors="coerce").fillna(0).astype(int)
+    
+    days = normalize_days(df["days"])
+    keep = days.notna()
+    df = df[keep].copy()
+    df["days"] = days[keep]
+    
+    df["start_hour"] = parse_clock_hours(df["start_time"])
+    
+    for col in ("instructor", "hall", "course_title"):
+        df[col] = clean_labels(df[col])
+    
+    df["department"] = extract_faculty(df["code"])
+    
+    return to_columnar(df if keep_index else df.reset_index(drop=True))
+
+
+def to_columnar(df):
+    """Make every object column single-typed so the frame round-trips through Arrow.
+
+    Workbook columns such as ``section`` and ``cred`` mix ints and strings;
+    they are stored as strings (missing values stay missing).
+    """
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        kinds = set(df[col].dropna().map(type))
+        if len(kinds) > 1:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
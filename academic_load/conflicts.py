@@ -0,0 +1,140 @@
+"""Hall double-booking and instructor clash detection.
+
+Sessions are grouped per (hall, day) and per (instructor, day). Within a
+group, intervals sorted by start time overlap an earlier interval exactly
+when they start before it ends, so one sort plus a binary search per
+session finds every overlapping pair in O(n log n + pairs) without any
+pairwise comparison. Intervals are half-open, so back-to-back sessions do
+not clash; sessions without a parsed time or with zero length are ignored,
+as are rows whose hall or instructor is "Unknown". When the frame carries
+``start_date``/``end_date``, pairs whose teaching periods do not overlap are
+dropped.
+"""
+import numpy as np
+import pandas as pd
+
+from .cleaning import clock_minutes
+
+CONFLICT_COLUMNS = [
+    "kind", "resource", "days", "row_a", "row_b",
+    "code_a", "section_a", "course_a", "start_a", "end_a",
+    "code_b", "section_b", "course_b", "start_b", "end_b",
+    "overlap_minutes",
+]
+
+
+# Conflict kind == the column holding the shared resource.
+CONFLICT_KINDS = ("hall", "instructor")
+
+
+def session_intervals(df):
+    """Start/end minute of day per row and a mask of rows with a usable interval."""
+    start = clock_minutes(df["start_time"])
+    end = clock_minutes(df["end_time"])
+    valid = ~np.isnan(start) & ~np.isnan(end) & (end > start)
+    return start, end, valid
+
+
+def overlapping_pairs(groups, start, end):
+    """Positions (a, b) of every overlapping interval pair within the same group.
+
+    ``groups`` are integer group ids; all three arrays are aligned.
+    """
+    if len(groups) == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    order = np.lexsort((start, groups))
+    g, s, e = groups[order], start[order], end[order]
+
+    # Any later-starting interval in the group that starts before this one
+    # ends overlaps it; find where that run stops with one binary search.
+    span = float(max(e.max(), s.max())) + 1.0
+    keys = g * span + s
+    stop = np.searchsorted(keys, g * span + e, side="left")
+    counts = np.maximum(stop - np.arange(len(s)) - 1, 0)
+
+    first = np.repeat(np.arange(len(s)), counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    second = first + 1 + (np.arange(counts.sum()) - offsets)
+    return order[first], order[second]
+
+
+def _pairs_for(df, column, start, end, valid):
+    resource_codes, labels = pd.factorize(df[column])
+    day_codes, days = pd.factorize(df["days"])
+    usable = valid & (resource_codes >= 0) & (day_codes >= 0)
+    if "Unknown" in labels:
+        usable &= resource_codes != labels.get_loc("Unknown")
+    rows = np.flatnonzero(usable)
+    groups = (resource_codes[rows] * len(days) + day_codes[rows]).astype(np.float64)
+    a, b = overlapping_pairs(groups, start[rows], end[rows])
+    return rows[a], rows[b]
+
+
+def find_conflicts(df, kinds=CONFLICT_KINDS):
+    """Overlapping session pairs sharing a hall or an instructor on the same day.
+
+    ``row_a``/``row_b`` are row positions in ``df``; times are minutes of day.
+    """
+    start, end, valid = session_intervals(df)
+    frames = []
+    for kind in kinds:
+        column = kind
+        a, b = _pairs_for(df, column, start, end, valid)
+        if "start_date" in df.columns and "end_date" in df.columns and len(a):
+            sd, ed = df["start_date"].to_numpy(), df["end_date"].to_numpy()
+            same_term = (sd[a] <= ed[b]) & (sd[b] <= ed[a])
+            same_term |= pd.isna(sd[a]) | pd.isna(sd[b]) | pd.isna(ed[a]) | pd.isna(ed[b])
+            a, b = a[same_term], b[same_term]
+        frames.append(pd.DataFrame({
+            "kind": kind,
+            "resource": df[column].to_numpy()[a],
+            "days": df["days"].to_numpy()[a],
+            "row_a": a,
+            "row_b": b,
+            "code_a": df["code"].to_numpy()[a],
+            "section_a": df["section"].to_numpy()[a] if "section" in df.columns else None,
+            "course_a": df["course_title"].to_numpy()[a],
+            "start_a": start[a],
+            "end_a": end[a],
+            "code_b": df["code"].to_numpy()[b],
+            "section_b": df["section"].to_numpy()[b] if "section" in df.columns else None,
+            "course_b": df["course_title"].to_numpy()[b],
+            "start_b": start[b],
+            "end_b": end[b],
+            "overlap_minutes": np.minimum(end[a], end[b]) - np.maximum(start[a], start[b]),
+        }, columns=CONFLICT_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def update_conflicts(conflicts, df, remap, touched):
+    """Bring a conflict table up to date after some rows of the schedule changed.
+
+    ``df`` is the updated schedule, ``remap`` maps old row positions to new
+    ones and ``touched`` maps each kind to the resources whose rows were
+    added or removed. Pairs on untouched resources are kept (renumbered);
+    touched resources are re-checked on their rows only.
+    """
+    stale = np.zeros(len(conflicts), dtype=bool)
+    frames = []
+    for kind in CONFLICT_KINDS:
+        resources = touched.get(kind, ())
+        is_kind = (conflicts["kind"] == kind).to_numpy()
+        stale |= is_kind & conflicts["resource"].isin(resources).to_numpy()
+        kept = conflicts[is_kind & ~stale]
+        rows = np.flatnonzero(df[kind].isin(resources).to_numpy())
+        fresh = find_conflicts(df.iloc[rows], kinds=(kind,))
+        fresh["row_a"], fresh["row_b"] = rows[fresh["row_a"]], rows[fresh["row_b"]]
+        kept = kept.assign(row_a=remap[kept["row_a"].to_numpy()], row_b=remap[kept["row_b"].to_numpy()])
+        frames += [kept, fresh]
+    return pd.concat(frames, ignore_index=True)
+
+
+def format_conflicts(conflicts):
+    """Human-readable copy of a conflict table (HH:MM times, no row positions)."""
+    out = conflicts.drop(columns=["row_a", "row_b"]).copy()
+    for col in ("start_a", "end_a", "start_b", "end_b"):
+        minutes = out[col].astype(int)
+        out[col] = (minutes // 60).map("{:02d}".format) + ":" + (minutes % 60).map("{:02d}".format)
+    out["overlap_minutes"] = out["overlap_minutes"].astype(int)
+    return out
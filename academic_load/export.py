@@ -0,0 +1,100 @@
+"""Chunked exporters for the filtered schedule and the dashboard's top-N tables.
+
+Rows are encoded a chunk at a time (CSV text, gzip stream or Parquet row
+groups), so only one chunk's encoding is alive at once next to the output
+buffer. The XLSX export holds only the aggregated tables and is written with
+openpyxl's write-only workbook.
+"""
+import gzip
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 50_000
+
+# label -> (file name, mime type)
+EXPORT_FORMATS = {
+    "CSV": ("filtered_schedule_filtered.csv", "text/csv"),
+    "CSV (gzip)": ("filtered_schedule_filtered.csv.gz", "application/gzip"),
+    "Parquet": ("filtered_schedule_filtered.parquet", "application/vnd.apache.parquet"),
+    "Excel (top-N tables)": (
+        "academic_load_top_tables.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+}
+
+# DashboardAnalytics field -> sheet name
+TOP_TABLE_SHEETS = {
+    "instructor_load": "Instructors",
+    "hall_usage": "Halls",
+    "popular_courses": "Courses by sessions",
+    "course_minutes": "Courses by minutes",
+    "faculty_share": "Faculties",
+}
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield start, df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df, fh, chunk_rows=CHUNK_ROWS):
+    """Write ``df`` as UTF-8 CSV to a binary file object, one chunk at a time."""
+    for start, chunk in _chunks(df, chunk_rows):
+        fh.write(chunk.to_csv(index=False, header=start == 0).encode("utf-8"))
+
+
+def write_csv_gz(df, fh, chunk_rows=CHUNK_ROWS):
+    with gzip.GzipFile(fileobj=fh, mode="wb") as gz:
+        write_csv(df, gz, chunk_rows)
+
+
+def write_parquet(df, fh, chunk_rows=CHUNK_ROWS):
+    """Write ``df`` as Parquet, one row group per chunk.
+
+    The schema is inferred once from the whole frame, so a chunk whose
+    object column happens to hold only missing values still gets its type.
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(fh, schema) as writer:
+        for _, chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _cell(value):
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, (int, float)):
+        return value
+    return str(value)
+
+
+def write_top_tables_xlsx(res, fh):
+    """One sheet per top-N table of a DashboardAnalytics result."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for field, sheet in TOP_TABLE_SHEETS.items():
+        frame = getattr(res, field)
+        ws = wb.create_sheet(sheet)
+        ws.append(list(frame.columns))
+        for row in frame.itertuples(index=False):
+            ws.append([_cell(v) for v in row])
+    wb.save(fh)
+
+
+def export_bytes(fmt, df=None, res=None, chunk_rows=CHUNK_ROWS):
+    """Encode ``df`` (row formats) or ``res`` (Excel) in the format labelled ``fmt``."""
+    buf = io.BytesIO()
+    if fmt == "CSV":
+        write_csv(df, buf, chunk_rows)
+    elif fmt == "CSV (gzip)":
+        write_csv_gz(df, buf, chunk_rows)
+    elif fmt == "Parquet":
+        write_parquet(df, buf, chunk_rows)
+    elif fmt == "Excel (top-N tables)":
+        write_top_tables_xlsx(res, buf)
+    else:
+        raise ValueError(f"unknown export format: {fmt}")
+    return buf.getvalue()
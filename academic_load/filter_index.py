@@ -0,0 +1,219 @@
+"""Row-position index for the dashboard's sidebar filters.
+
+Each filter dimension keeps its rows grouped by value (a stable argsort plus
+per-value offsets), and start hours are kept sorted for range queries. A
+selection is resolved to sorted row positions by taking the smallest
+candidate set and narrowing it with lookup tables over the other
+dimensions, so the cost follows the size of the selection rather than the
+size of the table. A date window keeps the rows with at least one dated
+occurrence inside it (see ``occurrences``); holidays are not consulted.
+``FilterIndex.apply_delta`` patches an index for a row delta: kept rows
+keep their place in every sort order and only the added rows are sorted
+and merged in.
+"""
+import copy
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .occurrences import in_window, occurrence_bounds
+
+# Sidebar hour slider: bounds (also its default selection) and step.
+HOUR_RANGE = (8.3, 21.45)
+HOUR_STEP = 0.25
+
+# FilterSpec field -> column of the cleaned schedule.
+DIMENSIONS = {
+    "instructors": "instructor",
+    "faculties": "department",
+    "halls": "hall",
+    "days": "days",
+}
+
+
+class FilterSpec(NamedTuple):
+    instructors: Tuple[str, ...] = ()
+    faculties: Tuple[str, ...] = ()
+    halls: Tuple[str, ...] = ()
+    days: Tuple[str, ...] = ()
+    hour_range: Optional[Tuple[float, float]] = None
+    dates: Optional[Tuple[str, str]] = None  # ISO first and last day, inclusive
+
+
+def make_spec(instructors=(), faculties=(), halls=(), days=(), hour_range=None, dates=None):
+    """Build a canonical (sorted, de-duplicated, hashable) FilterSpec."""
+    if hour_range is not None:
+        hour_range = (float(hour_range[0]), float(hour_range[1]))
+    if dates is not None:
+        dates = (str(np.datetime64(dates[0], "D")), str(np.datetime64(dates[1], "D")))
+    return FilterSpec(
+        tuple(sorted(set(instructors))),
+        tuple(sorted(set(faculties))),
+        tuple(sorted(set(halls))),
+        tuple(sorted(set(days))),
+        hour_range,
+        dates,
+    )
+
+
+class _Dimension:
+    def __init__(self, values):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, labels = pd.factorize(values)
+        n = len(labels)
+        # Missing values get their own bucket past the last label.
+        self.codes = np.where(codes < 0, n, codes).astype(np.int32)
+        self.labels = labels
+        self.lookup = {label: i for i, label in enumerate(labels)}
+        self.order = np.argsort(self.codes, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(self.codes, minlength=n + 1))))
+
+    def apply_delta(self, values, remap, added):
+        """The dimension of ``values``, the updated column, merging ``added`` rows into this row order.
+
+        ``remap`` maps old row positions to new ones (-1 = removed) and must
+        be increasing over the kept rows. Rebuilt from scratch when the
+        column is not categorical or its old labels changed order.
+        """
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            return _Dimension(values)
+        labels = values.cat.categories
+        same = labels.equals(self.labels)
+        if not same:
+            moved = labels.get_indexer(self.labels)
+            if (moved < 0).any() or (np.diff(moved) <= 0).any():
+                return _Dimension(values)
+        n = len(labels)
+        out = copy.copy(self)
+        codes = values.cat.codes.to_numpy()
+        out.codes = np.where(codes < 0, n, codes).astype(np.int32)
+        out.labels = labels
+        if not same:
+            out.lookup = {label: i for i, label in enumerate(labels)}
+        kept = remap[self.order]
+        kept = kept[kept >= 0]
+        added = np.sort(added)
+        added = added[np.argsort(out.codes[added], kind="stable")]
+        size = np.int64(len(out.codes))
+        at = np.searchsorted(out.codes[kept] * size + kept, out.codes[added] * size + added)
+        out.order = np.insert(kept, at, added)
+        out.offsets = np.concatenate(([0], np.cumsum(np.bincount(out.codes, minlength=n + 1))))
+        return out
+
+    def value_codes(self, selected):
+        return sorted({self.lookup[v] for v in selected if v in self.lookup})
+
+    def count(self, codes):
+        return int(sum(self.offsets[c + 1] - self.offsets[c] for c in codes))
+
+    def positions(self, codes):
+        parts = [self.order[self.offsets[c]:self.offsets[c + 1]] for c in codes]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def member_table(self, codes):
+        table = np.zeros(len(self.offsets) - 1, dtype=bool)
+        table[codes] = True
+        return table
+
+
+class FilterIndex:
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.dimensions = {field: _Dimension(df[col]) for field, col in DIMENSIONS.items()}
+
+        hours = df["start_hour"].to_numpy()
+        known = ~np.isnan(hours)
+        self.start_hour = hours
+        self.hour_order = np.flatnonzero(known)[np.argsort(hours[known], kind="stable")]
+        self.hour_sorted = hours[self.hour_order]
+        self.hour_missing = np.flatnonzero(~known)
+
+        self.first = self.last = None
+        if "class_dates" in df.columns:
+            self.first, self.last = occurrence_bounds(df)
+
+    def apply_delta(self, df, remap, added):
+        """A new index for ``df``, the updated schedule; ``self`` is unchanged.
+
+        ``remap`` maps each old row position to its new one (-1 = removed)
+        and ``added`` holds the positions of the new rows, so every row of
+        ``df`` is one or the other. Kept rows reuse their sort positions and
+        occurrence bounds; only the added rows are sorted and parsed. Falls
+        back to a full build when kept rows changed order.
+        """
+        kept = remap[remap >= 0]
+        if (np.diff(kept) <= 0).any() or (self.first is None) != ("class_dates" not in df.columns):
+            return FilterIndex(df)
+        added = np.asarray(added, dtype=np.intp)
+        out = copy.copy(self)
+        out.n_rows = len(df)
+        out.dimensions = {field: self.dimensions[field].apply_delta(df[col], remap, added)
+                          for field, col in DIMENSIONS.items()}
+
+        hours = df["start_hour"].to_numpy()
+        out.start_hour = hours
+        kept = remap[self.hour_order]
+        kept = kept[kept >= 0]
+        fresh = added[~np.isnan(hours[added])]
+        fresh = fresh[np.argsort(hours[fresh], kind="stable")]
+        out.hour_order = np.insert(kept, np.searchsorted(hours[kept], hours[fresh], side="right"), fresh)
+        out.hour_sorted = hours[out.hour_order]
+        out.hour_missing = np.flatnonzero(np.isnan(hours))
+
+        if self.first is not None:
+            out.first = np.empty(len(df), dtype=self.first.dtype)
+            out.last = np.empty(len(df), dtype=self.last.dtype)
+            moved = remap >= 0
+            out.first[remap[moved]] = self.first[moved]
+            out.last[remap[moved]] = self.last[moved]
+            out.first[added], out.last[added] = occurrence_bounds(df.iloc[added])
+        return out
+
+    def select(self, spec):
+        """Sorted row positions matching ``spec``.
+
+        Rows without a parsed start time are kept by the hour filter, as the
+        dashboard always has; rows without parseable dates are kept by the
+        date window in the same way.
+        """
+        chosen = []
+        for field, dim in self.dimensions.items():
+            values = getattr(spec, field)
+            if values:
+                codes = dim.value_codes(values)
+                chosen.append((dim.count(codes), dim, codes))
+
+        rows = None
+        if chosen:
+            chosen.sort(key=lambda item: item[0])
+            _, dim, codes = chosen[0]
+            rows = dim.positions(codes)
+            for _, dim, codes in chosen[1:]:
+                rows = rows[dim.member_table(codes)[dim.codes[rows]]]
+
+        if spec.hour_range is not None:
+            lo, hi = spec.hour_range
+            if rows is None:
+                a = np.searchsorted(self.hour_sorted, lo, side="left")
+                b = np.searchsorted(self.hour_sorted, hi, side="right")
+                rows = np.sort(np.concatenate([self.hour_order[a:b], self.hour_missing]))
+            else:
+                h = self.start_hour[rows]
+                rows = rows[np.isnan(h) | ((h >= lo) & (h <= hi))]
+
+        if spec.dates is not None and self.first is not None:
+            if rows is None:
+                rows = np.flatnonzero(in_window(self.first, self.last, *spec.dates))
+            else:
+                rows = rows[in_window(self.first[rows], self.last[rows], *spec.dates)]
+
+        if rows is None:
+            rows = np.arange(self.n_rows)
+        return rows
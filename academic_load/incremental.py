@@ -0,0 +1,389 @@
+"""Incremental re-ingestion of the schedule workbook.
+
+``ScheduleStore`` follows one source. ``refresh()`` is a ``stat`` while the
+file is untouched; when its mtime or size moves the bytes are hashed, and
+only if the content really changed is the workbook re-read. Every raw row
+gets a 64-bit fingerprint of its values (numbered within exact duplicates),
+so a new version is diffed against the previous one by fingerprint: only
+rows with a new fingerprint are cleaned and compacted, rows whose
+fingerprint disappeared are dropped by position, and an edited row is one of
+each. The result is a new ``ScheduleState`` whose filter index, hall
+occupancy and conflict table are the previous ones with the delta applied;
+cached panel aggregates carry over for every selection the changed rows
+are not part of.
+
+Re-reading the workbook and re-assembling the table remain linear, but they
+are plain vectorized copies; cleaning and aggregation follow the size of
+the change. Edits touching more than ``REBUILD_FRACTION`` of the rows fall
+back to a full rebuild.
+
+Instructor and hall names are canonicalized (see ``names``) on the way into
+each state; the store keeps the cleaned table with the original spellings
+for patching and caching, so an edited alias file takes effect on the next
+change. Only labels the previous table lacked are clustered; the rest keep
+their names, and the resolved aliases are cached next to the frame so a
+restart reuses them too. A refresh that re-maps names the previous state
+already used is a full rebuild.
+"""
+import hashlib
+import io
+import os
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .analytics import AnalyticsEngine
+from .backends import make_backend
+from .cache import (
+    cache_key, cache_path, names_path, read_mapped, read_names, read_rows, rows_path, source_bytes, write_atomic,
+    write_names, write_rows,
+)
+from .cleaning import clean_schedule, read_schedule
+from .conflicts import CONFLICT_KINDS, find_conflicts, format_conflicts, update_conflicts
+from .filter_index import FilterIndex
+from .names import aliases_path, canonicalize, resolve_aliases, same_canonical
+from .occupancy import HallOccupancy
+from .occurrences import SessionCalendar, holidays_from_env
+from .schema import compact_schedule, freeze
+
+REBUILD_FRACTION = 0.3
+
+# Odd 64-bit constant separating the occurrences of duplicate rows.
+_DUPLICATE_STRIDE = np.uint64(0x9E3779B97F4A7C15)
+
+
+def row_keys(raw):
+    """One uint64 fingerprint per raw row, salted with the header.
+
+    Identical rows get distinct keys by occurrence, so the keys are unique
+    and a renamed or reordered header changes every key.
+    """
+    header = "\x1f".join(map(str, raw.columns)).encode("utf-8")
+    salt = np.uint64(int(hashlib.sha256(header).hexdigest()[:16], 16))
+    fp = pd.util.hash_pandas_object(raw, index=False).to_numpy() ^ salt
+    occurrence = pd.Series(fp).groupby(fp, sort=False).cumcount().to_numpy().astype(np.uint64)
+    return fp + occurrence * _DUPLICATE_STRIDE
+
+
+class Delta(NamedTuple):
+    added: np.ndarray    # row positions in the new table
+    removed: np.ndarray  # row positions in the previous table
+    full: bool = False   # the table was rebuilt rather than patched
+
+
+class ScheduleState:
+    """One version of the cleaned schedule plus the structures derived from it.
+
+    The table is frozen (read-only buffers) and shared by every session;
+    sessions work with row positions into it rather than copies. Derived
+    structures are built on first use and never mutated afterwards, so a
+    session still holding an older state keeps a consistent view.
+    """
+
+    def __init__(self, df, version=0, derived=None):
+        self.df = None if df is None else freeze(df)
+        self.version = version
+        self._derived = dict(derived or {})
+        self._lock = threading.RLock()
+
+    def _get(self, name, build):
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = build()
+            return self._derived[name]
+
+    def built(self, name):
+        return self._derived.get(name)
+
+    def labels(self, column):
+        """Sorted distinct values of ``column`` (the sidebar options), computed once per state."""
+        def build():
+            s = self.df[column]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                codes = s.cat.codes.to_numpy()
+                used = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(s.cat.categories)))
+                return sorted(s.cat.categories[used])
+            return sorted(set(s.dropna()))
+        return self._get(("labels", column), build)
+
+    @property
+    def name_review(self):
+        """Name variants folded into canonical names when this state was loaded, or None."""
+        return self._derived.get("name_review")
+
+    @property
+    def index(self):
+        return self._get("index", lambda: FilterIndex(self.df))
+
+    @property
+    def engine(self):
+        return self._get("engine", lambda: AnalyticsEngine(make_backend(self.df, self.index)))
+
+    @property
+    def conflicts(self):
+        return self._get("conflicts", lambda: find_conflicts(self.df))
+
+    @property
+    def conflict_table(self):
+        """``conflicts`` formatted for display, row-aligned with it."""
+        return self._get("conflict_table", lambda: format_conflicts(self.conflicts))
+
+    @property
+    def occupancy(self):
+        return self._get("occupancy", lambda: HallOccupancy(self.df))
+
+    @property
+    def calendar(self):
+        def build():
+            index = self.index
+            bounds = None if index.first is None else (index.first, index.last)
+            return SessionCalendar(self.df, holidays_from_env(), bounds)
+        return self._get("calendar", build)
+
+
+def _like(values, reference):
+    """Cast object ``values`` to str where ``reference`` holds strings, as ``to_columnar`` would."""
+    if values.dtype != object:
+        return values
+    sample = next((v for v in reference if pd.notna(v)), None)
+    kinds = set(values.dropna().map(type))
+    if sample is None or kinds <= {type(sample)}:
+        return values
+    if isinstance(sample, str):
+        return values.where(values.isna(), values.astype(str))
+    raise TypeError(f"column type changed from {type(sample).__name__}")
+
+
+def _align(base, delta):
+    """Give ``delta`` the dtypes of ``base``, widening category sets where needed.
+
+    Returns the (possibly re-categorized) base and the aligned delta. Raises
+    TypeError or ValueError when a column can no longer take its old dtype.
+    """
+    base = base.copy(deep=False)
+    delta = delta.reindex(columns=base.columns)
+    for col in base.columns:
+        dtype = base[col].dtype
+        values = delta[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        if isinstance(dtype, pd.CategoricalDtype):
+            cats = dtype.categories
+            if cats.dtype == object:
+                values = _like(values, cats)
+            new = pd.Index(values.dropna().unique()).difference(cats)
+            if len(new):
+                cats = cats.append(new).sort_values()
+                base[col] = base[col].cat.set_categories(cats)
+            delta[col] = pd.Categorical(values, categories=cats)
+        else:
+            delta[col] = _like(values, base[col]).astype(dtype)
+    return base, delta
+
+
+def _clean(raw):
+    """Cleaned, compacted frame plus the cleaned position of each raw row (-1 = dropped)."""
+    cleaned = clean_schedule(raw, keep_index=True)
+    positions = np.full(len(raw), -1, dtype=np.int64)
+    positions[raw.index.get_indexer(cleaned.index)] = np.arange(len(cleaned))
+    return compact_schedule(cleaned.reset_index(drop=True)), positions
+
+
+class ScheduleStore:
+    """Current ``ScheduleState`` of one source, kept up to date by ``refresh()``.
+
+    Paths are re-checked on every refresh; uploaded files never change.
+    """
+
+    def __init__(self, source="cleaned_schedule.xlsx", cache_dir=None, aliases=None):
+        self.source = source
+        self.cache_dir = cache_dir
+        self.aliases = aliases or aliases_path(source, cache_dir)
+        self.state = ScheduleState(None)
+        self.last_delta = None
+        self._stamp = None
+        self._key = None
+        self._keys = None
+        self._positions = None
+        self._table = None
+        self._names = None
+        self._review = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _stat(self):
+        if not isinstance(self.source, (str, os.PathLike)):
+            return "upload"
+        try:
+            st = os.stat(self.source)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def refresh(self):
+        """Pick up changes to the source. Returns the applied ``Delta``, or None."""
+        with self._lock:
+            stamp = self._stat()
+            if stamp is None or stamp == self._stamp:
+                return None
+            try:
+                data = source_bytes(self.source)
+            except Exception:
+                return None
+            key = cache_key(data)
+            delta = None if key == self._key else self._load(key, data)
+            if key == self._key or delta is not None:
+                self._stamp = stamp
+            if delta is not None:
+                self.last_delta = delta
+            return delta
+
+    def _read_cache(self, key):
+        try:
+            return read_mapped(cache_path(key, self.cache_dir)), *read_rows(rows_path(key, self.cache_dir))
+        except Exception:
+            return None
+
+    def _write_cache(self, key, df, keys, positions):
+        try:
+            write_atomic(df, cache_path(key, self.cache_dir))
+            write_rows(keys, positions, rows_path(key, self.cache_dir))
+            if self._key is not None and self._key != key:
+                for path in (cache_path(self._key, self.cache_dir), rows_path(self._key, self.cache_dir),
+                             names_path(self._key, self.cache_dir)):
+                    if os.path.exists(path):
+                        os.remove(path)
+        except OSError:
+            pass
+
+    def _resolve(self, key, df):
+        """``resolve_aliases`` for ``df``, starting from the previous state or the cached result."""
+        previous = None
+        if self._names is not None:
+            previous = self._names, self._review, self._table
+        else:
+            try:
+                previous = *read_names(names_path(key, self.cache_dir)), df
+            except Exception:
+                pass
+        names, review = resolve_aliases(df, self.aliases, previous=previous)
+        try:
+            write_names(names, review, names_path(key, self.cache_dir))
+        except OSError:
+            pass
+        return names, review
+
+    def _load(self, key, data):
+        old = self.state
+        cached = self._read_cache(key)
+        raw = None
+        if cached is None:
+            try:
+                raw = read_schedule(io.BytesIO(data))
+            except Exception:
+                return None
+            keys = row_keys(raw)
+        else:
+            keys = cached[1]
+
+        pos = None
+        if old.df is not None and self._keys is not None:
+            previous = pd.Index(self._keys)
+            if previous.is_unique:
+                pos = previous.get_indexer(keys)
+        if pos is not None:
+            fresh = np.flatnonzero(pos < 0)
+            survived = np.zeros(len(self._keys), dtype=bool)
+            survived[pos[pos >= 0]] = True
+            gone = np.flatnonzero(~survived)
+            if len(fresh) + len(gone) > REBUILD_FRACTION * max(len(keys), 1):
+                pos = None
+
+        if pos is None:
+            if cached is not None:
+                df, _, positions = cached
+            else:
+                df, positions = _clean(raw)
+                self._write_cache(key, df, keys, positions)
+            names, review = self._resolve(key, df)
+            state = ScheduleState(canonicalize(df, names), old.version + 1, {"name_review": review})
+            self._advance(state, df, names, review, keys, positions, key)
+            return Delta(np.arange(len(df)), np.arange(len(old.df) if old.df is not None else 0), full=True)
+
+        # Cleaned position in the previous table of each reused raw row.
+        reused = np.where(pos >= 0, self._positions[pos], -1)
+        if cached is not None:
+            df, _, positions = cached
+        else:
+            try:
+                df, positions = self._patch(self._table, raw, fresh, reused)
+            except (TypeError, ValueError):
+                df, positions = _clean(raw)
+            self._write_cache(key, df, keys, positions)
+
+        removed = self._positions[gone]
+        removed = removed[removed >= 0]
+        added = positions[fresh]
+        added = added[added >= 0]
+        remap = np.full(len(old.df), -1, dtype=np.int64)
+        kept = reused >= 0
+        remap[reused[kept]] = positions[kept]
+
+        names, review = self._resolve(key, df)
+        state = ScheduleState(canonicalize(df, names), old.version + 1, {"name_review": review})
+        full = not same_canonical(self._names, names, self._table)
+        if not full:
+            _carry(old, state, removed, added, remap)
+        self._advance(state, df, names, review, keys, positions, key)
+        if full:
+            return Delta(np.arange(len(df)), np.arange(len(old.df)), full=True)
+        return Delta(added, removed)
+
+    def _patch(self, base, raw, fresh, reused):
+        """The new table: reused rows taken from ``base``, rows in ``fresh`` cleaned anew."""
+        delta, fresh_positions = _clean(raw.iloc[fresh])
+        base, delta = _align(base, delta)
+        source = reused.copy()
+        landed = fresh_positions >= 0
+        source[fresh[landed]] = len(base) + fresh_positions[landed]
+        take = source[source >= 0]
+        positions = np.full(len(raw), -1, dtype=np.int64)
+        positions[source >= 0] = np.arange(len(take))
+        df = pd.concat([base, delta], ignore_index=True).take(take).reset_index(drop=True)
+        return df, positions
+
+    def _advance(self, state, table, names, review, keys, positions, key):
+        self._keys, self._positions, self._key = keys, positions, key
+        self._table, self._names, self._review = table, names, review
+        self.state = state
+
+
+def _carry(old, new, removed, added, remap):
+    """Apply a row delta to every structure ``old`` had built, storing the results on ``new``.
+
+    ``removed`` and ``added`` are row positions in the old and new table.
+    """
+    index = old.built("index")
+    if index is not None:
+        new._derived["index"] = index.apply_delta(new.df, remap, added)
+    engine = old.built("engine")
+    if engine is not None:
+        def unchanged(spec):
+            before = index.select(spec)
+            return (len(before) > 0 and not np.isin(removed, before).any()
+                    and not np.isin(added, new.index.select(spec)).any())
+        new._derived["engine"] = engine.carry(make_backend(new.df, new.index), unchanged)
+
+    removed, added = old.df.iloc[removed], new.df.iloc[added]
+    touched = {
+        kind: pd.unique(pd.concat([removed[kind].astype(object), added[kind].astype(object)]).dropna())
+        for kind in CONFLICT_KINDS
+    }
+    occupancy = old.built("occupancy")
+    if occupancy is not None:
+        new._derived["occupancy"] = occupancy.apply_delta(new.df, touched["hall"])
+    conflicts = old.built("conflicts")
+    if conflicts is not None:
+        new._derived["conflicts"] = update_conflicts(conflicts, new.df, remap, touched)
@@ -0,0 +1,75 @@
+"""Per-stage timing and memory instrumentation for the dashboard.
+
+A ``Profiler`` records wall time, rows in/out and peak allocation for each
+``with profiler.stage(name):`` block. It is inert unless
+``DASHBOARD_DIAGNOSTICS`` is set (show the diagnostics panel) or
+``DASHBOARD_TIMINGS_LOG`` names a file (append one JSON line per stage).
+Peak allocation comes from tracemalloc, which is process-wide, so with
+several sessions rendering at once the figure is an upper bound.
+"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+DIAGNOSTICS_ENV = "DASHBOARD_DIAGNOSTICS"
+TIMINGS_LOG_ENV = "DASHBOARD_TIMINGS_LOG"
+
+
+def _flag(value):
+    return str(value or "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+class Profiler:
+    def __init__(self, show=False, log_path=None, trace_memory=True):
+        self.show = show
+        self.log_path = log_path
+        self.enabled = show or bool(log_path)
+        self.trace_memory = self.enabled and trace_memory
+        self.records = []
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        return cls(show=_flag(environ.get(DIAGNOSTICS_ENV)), log_path=environ.get(TIMINGS_LOG_ENV) or None)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time a block; set ``rec["rows_in"]``/``rec["rows_out"]`` inside it as needed."""
+        rec = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        if not self.enabled:
+            yield rec
+            return
+        if self.trace_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["seconds"] = time.perf_counter() - t0
+            rec["peak_kb"] = (tracemalloc.get_traced_memory()[1] - base) / 1024 if self.trace_memory else None
+            self.records.append(rec)
+
+    def frame(self):
+        out = pd.DataFrame(self.records, columns=["stage", "seconds", "rows_in", "rows_out", "peak_kb"])
+        out["ms"] = out.pop("seconds") * 1000
+        return out[["stage", "ms", "rows_in", "rows_out", "peak_kb"]]
+
+    def total_seconds(self):
+        return sum(r["seconds"] for r in self.records)
+
+    def write_log(self, **context):
+        """Append the recorded stages as JSON lines, each tagged with ``context``."""
+        if not self.log_path or not self.records:
+            return
+        ts = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        lines = [json.dumps({"ts": ts, **context, **rec}, default=str) for rec in self.records]
+        with open(self.log_path, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
@@ -0,0 +1,540 @@
+"""Fuzzy de-duplication of instructor and hall names.
+
+    python -m academic_load.names [workbook.xlsx] [--aliases FILE] [--out review.csv] [--apply review.csv]
+
+Labels are first reduced to a comparison key: accents stripped, Cyrillic
+transliterated, lower-cased, degree suffixes ("Ph.D.", "MA in Linguistics")
+dropped, then each person's surname followed by their other name tokens in
+sorted order, so "Smith, John" and "John Smith, PhD" get the same key but
+"Li Wei" and "Wei Li" do not. Labels with equal keys are merged outright.
+The rest are only compared inside blocks that share a phonetic signature of
+one of their tokens (or, for halls, a room number), which keeps the number
+of comparisons near-linear in the number of labels. A block larger than
+``MAX_BLOCK`` (a common first name) is split by the initials of the labels'
+other tokens, and skipped if it is still too large. Within a block two
+labels merge when one's tokens contain the other's (a dropped middle name)
+or they differ in one token by one edit (a typo or a transliteration
+variant). For instructors both need the same surname on both sides, and an
+edit has to fall on a surname of at least ``MIN_EDIT_LENGTH`` characters,
+so "Anna Kim" / "Anna Kim Lee", "John Lee" / "John Lei" and "Murat" /
+"Marat Sultanov" stay apart; a gendered surname ending such as
+"-ov"/"-ova" or a different room number never merges. Comma segments after
+the name are dropped only when they start with a known degree word, so
+initials ("Ospanov, A.") count. Each cluster takes its most frequent
+spelling as the canonical name.
+
+Merges found by clustering apply to the table at hand but are not saved.
+The alias file holds only reviewer decisions: ``--out`` writes the review
+table with an empty ``decision`` column, and ``--apply`` records the rows
+marked ``merge`` as aliases and those marked ``distinct`` as pairs that are
+never merged. Saved aliases win over fresh clustering, so a confirmed
+canonical name never changes. The file is ``SCHEDULE_ALIASES`` when set,
+otherwise ``name_aliases.json`` next to the workbook (or in the cache
+directory for uploads). Canonicalization only rewrites the categorical
+dictionaries, so it costs one integer take per column whatever the table
+size.
+"""
+import argparse
+import functools
+import json
+import os
+import re
+import sys
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .cache import CACHE_DIR, _replace_atomic, load_and_clean
+
+ALIASES_ENV = "SCHEDULE_ALIASES"
+ALIASES_FILE = "name_aliases.json"
+DEDUP_COLUMNS = ("instructor", "hall")
+MAX_BLOCK = 50
+MIN_EDIT_LENGTH = 5
+UNKNOWN = "Unknown"
+REVIEW_COLUMNS = ["column", "name", "canonical", "rows", "rule", "score"]
+DECISIONS = ("merge", "distinct")
+
+DEGREE_WORDS = {
+    "ba", "bsc", "bij", "ma", "msc", "mba", "mpa", "mir", "mafl", "mpma", "mbe", "mphil", "mres", "llb", "llm",
+    "jd", "phd", "ph", "dba", "csc", "dsc", "cma", "cpa", "acca", "cfa", "prm", "tesol", "ms", "mis", "mfa",
+    "med", "mcs", "mscs", "meti", "mmba", "exmba", "mmkt", "candidate", "diploma", "master", "masters", "bachelor",
+    "doctor", "professor", "prof", "dr",
+}
+HALL_NOISE = {"bld", "bldg", "building", "room", "rm", "aud", "auditorium"}
+
+_CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "ғ": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z",
+    "и": "i", "й": "y", "і": "i", "к": "k", "қ": "k", "л": "l", "м": "m", "н": "n", "ң": "n", "о": "o",
+    "ө": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ұ": "u", "ү": "u", "ф": "f", "х": "kh",
+    "һ": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e",
+    "ю": "yu", "я": "ya",
+}
+_TRANSLIT = str.maketrans({**_CYRILLIC, **{k.upper(): v.capitalize() for k, v in _CYRILLIC.items()}})
+_PHONETIC = (("dzh", "j"), ("kh", "h"), ("zh", "j"), ("sh", "s"), ("ch", "c"), ("ph", "f"), ("ts", "c"),
+             ("yu", "u"), ("ya", "a"), ("ye", "e"), ("yo", "o"), ("w", "v"), ("q", "k"), ("x", "ks"), ("y", "i"))
+
+
+def _ascii(text):
+    text = unicodedata.normalize("NFKD", str(text).translate(_TRANSLIT))
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _words(text):
+    return re.findall(r"[A-Za-z0-9]+", text.replace(".", ""))
+
+
+def _is_degree(segment):
+    """A comma segment that is a degree ("Ph.D.", "MA in Linguistics"), not a given name or initial."""
+    words = _words(segment)
+    return not words or words[0].lower() in DEGREE_WORDS
+
+
+def _person_words(person):
+    """(name words, surname) of one person: "First Last, PhD" and "Last, First" give surname "Last"."""
+    segments = person.split(",")
+    rest = [s for s in segments[1:] if not _is_degree(s)]
+    words = _words(" ".join([segments[0]] + rest))
+    # "PhD", "MA" but not the surname "Ma"
+    while len(words) > 1 and words[-1].lower() in DEGREE_WORDS and words[-1] != words[-1].capitalize():
+        words.pop()
+    surname = (_words(segments[0]) if rest else words)[-1:]
+    return [w.lower() for w in words], {w.lower() for w in surname}
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def name_key(label, column="instructor"):
+    """Comparison key of a label; labels with equal keys are the same name."""
+    text = _ascii(label)
+    if column == "hall":
+        tokens = [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in HALL_NOISE]
+        return " ".join(sorted(tokens))
+    people = []
+    for person in text.split(";"):
+        if not person.strip():
+            continue
+        words, surname = _person_words(person)
+        rest = sorted(words)
+        for word in surname:
+            rest.remove(word)
+        people.append(" ".join(sorted(surname) + rest))
+    return " ; ".join(sorted(people))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def surnames(label):
+    """Lower-cased surname tokens of an instructor label, one per person."""
+    return frozenset().union(*(_person_words(p)[1] for p in _ascii(label).split(";") if p.strip()))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def phonetic(token):
+    """Consonant skeleton of a token after folding common transliteration variants."""
+    t = token.lower()
+    for a, b in _PHONETIC:
+        t = t.replace(a, b)
+    rest = re.sub(r"[aeiou]", "", t[1:])
+    return t[:1] + re.sub(r"(.)\1+", r"\1", rest)
+
+
+def blocking_keys(key):
+    keys = set()
+    for token in key.replace(";", " ").split():
+        if token.isdigit():
+            keys.add("n:" + token)
+        elif len(token) >= 3:
+            keys.add("p:" + phonetic(token))
+    return keys
+
+
+def _refine(block, key):
+    """Sub-block of an oversized ``block``: the initials of the key's other name tokens."""
+    token = block[2:]
+    others = sorted(t[0] for t in key.replace(";", " ").split()
+                    if len(t) > 1 and not (block.startswith("p:") and phonetic(t) == token))
+    return block + "|" + "".join(others)
+
+
+def candidate_pairs(keys, fresh=None):
+    """Distinct pairs of ``keys`` sharing a blocking key (with one of them in ``fresh``, if given)."""
+    blocks = {}
+    for key in keys:
+        for block in blocking_keys(key):
+            blocks.setdefault(block, []).append(key)
+    for block, members in list(blocks.items()):
+        if len(members) > MAX_BLOCK:
+            del blocks[block]
+            for key in members:
+                blocks.setdefault(_refine(block, key), []).append(key)
+    seen = set()
+    for members in blocks.values():
+        if len(members) > MAX_BLOCK or (fresh is not None and fresh.isdisjoint(members)):
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                if fresh is not None and a not in fresh and b not in fresh:
+                    continue
+                pair = (a, b) if a < b else (b, a)
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+
+
+def _one_edit(a, b):
+    """True when ``b`` is ``a`` with one character inserted, deleted, replaced or swapped."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+    return a[i + 1:] == b[i:] if len(a) > len(b) else a[i:] == b[i + 1:]
+
+
+def _gendered(ta, tb):
+    """Tokens differ only by a feminine "-a" ending (Safarov / Safarova)."""
+    diff = set(ta) ^ set(tb)
+    if len(diff) != 2:
+        return False
+    x, y = sorted(diff, key=len)
+    return y == x + "a"
+
+
+def _match(a, b, family=None):
+    """(rule, score) when keys ``a`` and ``b`` name the same thing, else None.
+
+    ``family`` maps each key to its surname tokens (instructors only); a
+    subset then needs the same surname on both sides and a one-character
+    edit has to fall on the surname of both labels, so "Anna Kim" / "Anna
+    Kim Lee" and "Murat" / "Marat Sultanov" stay two people. Tokens shorter
+    than ``MIN_EDIT_LENGTH`` are never edited.
+    """
+    if a.count(";") != b.count(";"):
+        return None
+    ta, tb = a.replace(";", " ").split(), b.replace(";", " ").split()
+    if [t for t in ta if t.isdigit()] != [t for t in tb if t.isdigit()]:
+        return None
+    sa, sb = set(ta), set(tb)
+    small, large = (sa, sb) if len(ta) <= len(tb) else (sb, sa)
+    if len(small) >= 2 and small < large and ";" not in a and (family is None or family[a] == family[b]):
+        return "subset", round(len(small) / len(large), 3)
+    if len(ta) != len(tb) or abs(len(a) - len(b)) > 1:
+        return None
+    x, y = sa - sb, sb - sa
+    if len(x) != 1 or len(y) != 1:
+        return None
+    (x,), (y,) = x, y
+    if min(len(x), len(y)) < MIN_EDIT_LENGTH or not _one_edit(x, y) or _gendered(ta, tb):
+        return None
+    if family is not None and not (x in family[a] and y in family[b]):
+        return None
+    return "one edit", round(1 - 1 / max(len(a), len(b)), 3)
+
+
+class _Clusters:
+    """Union-find over labels that refuses to join clusters holding a distinct pair."""
+
+    def __init__(self, labels, distinct=()):
+        self.parent = {label: label for label in labels}
+        self.members = {label: {label} for label in labels}
+        self.apart = {}
+        for a, b in distinct:
+            self.apart.setdefault(a, set()).add(b)
+            self.apart.setdefault(b, set()).add(a)
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        """Join the clusters of ``a`` and ``b``; False when they are already one or must stay apart."""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        small, large = sorted((self.members[ra], self.members[rb]), key=len)
+        if any(self.apart.get(x, set()) & large for x in small):
+            return False
+        self.parent[rb] = ra
+        self.members[ra] |= self.members.pop(rb)
+        return True
+
+    def groups(self):
+        return [list(m) for m in self.members.values()]
+
+
+def cluster_labels(counts, column="instructor", known=None, distinct=(), settled=None, fresh=None):
+    """Group near-duplicate labels.
+
+    ``counts`` maps each label to its row count, ``known`` is the persisted
+    alias map of this column and ``distinct`` pairs that must stay apart.
+    Returns the alias map (variant -> canonical, persisted entries kept)
+    and a review frame with one row per variant folded into another name.
+
+    ``settled`` is the review frame of an earlier version of the table and
+    ``fresh`` the labels that version lacked: its merges are kept as they
+    were and only pairs involving a fresh label are compared.
+    """
+    apart = {frozenset(pair) for pair in distinct}
+    known = {v: c for v, c in (known or {}).items() if frozenset((v, c)) not in apart}
+    before = {}
+    if settled is not None:
+        for name, canonical, rule, score in settled[["name", "canonical", "rule", "score"]].itertuples(index=False):
+            if name in counts and frozenset((name, canonical)) not in apart:
+                before[name] = canonical, rule, score
+    if fresh is not None and not fresh:
+        aliases = dict(known)
+        rows = []
+        for name, (canonical, rule, score) in before.items():
+            aliases[name] = canonical
+            rows.append({"column": column, "name": name, "canonical": canonical,
+                         "rows": int(counts[name]), "rule": rule, "score": score})
+        return aliases, pd.DataFrame(rows, columns=REVIEW_COLUMNS)
+
+    labels = [label for label in counts if label != UNKNOWN]
+    # Earlier canonical names stay cluster members even when their own rows are gone.
+    labels += sorted({c for c, _, _ in before.values() if c not in counts})
+    keys = {label: name_key(label, column) for label in labels}
+    clusters = _Clusters(labels, distinct)
+    why = {name: (rule, score) for name, (_, rule, score) in before.items()}
+
+    def join(a, b, rule, score):
+        if clusters.union(a, b):
+            why.setdefault(b, (rule, score))
+            why.setdefault(a, (rule, score))
+
+    for variant, canonical in known.items():
+        if variant in clusters.parent and canonical in clusters.parent:
+            join(canonical, variant, "alias file", 1.0)
+    for variant, (canonical, rule, score) in before.items():
+        join(canonical, variant, rule, score)
+
+    by_key = {}
+    for label, key in keys.items():
+        by_key.setdefault(key, []).append(label)
+    for same in by_key.values():
+        for other in same[1:]:
+            join(same[0], other, "normalized", 1.0)
+
+    family = None
+    if column != "hall":
+        family = {key: set().union(*map(surnames, same)) for key, same in by_key.items()}
+    fresh_keys = None if fresh is None else {keys[label] for label in fresh if label in keys}
+    for a, b in candidate_pairs(by_key, fresh_keys):
+        found = _match(a, b, family)
+        if found:
+            join(by_key[a][0], by_key[b][0], *found)
+
+    aliases = dict(known)
+    rows = []
+    for group in clusters.groups():
+        if len(group) < 2:
+            continue
+        targets = [known[g] for g in group if g in known] + [before[g][0] for g in group if g in before]
+        canonical = targets[0] if targets else min(group, key=lambda g: (-counts[g], -len(g), g))
+        for label in sorted(group):
+            if label == canonical or label not in counts:
+                continue
+            aliases[label] = canonical
+            rule, score = why.get(label, ("cluster", None))
+            if label in known:
+                rule, score = "alias file", 1.0
+            rows.append({"column": column, "name": label, "canonical": canonical,
+                         "rows": int(counts[label]), "rule": rule, "score": score})
+    review = pd.DataFrame(rows, columns=REVIEW_COLUMNS)
+    return aliases, review
+
+
+def aliases_path(source=None, cache_dir=None):
+    """Alias file for ``source``: ``SCHEDULE_ALIASES``, else next to the data, else in the cache directory.
+
+    ``source`` is a workbook path or an archive directory; uploads and
+    other sources without a path use ``cache_dir``.
+    """
+    if os.environ.get(ALIASES_ENV):
+        return os.environ[ALIASES_ENV]
+    if isinstance(source, (str, os.PathLike)):
+        source = os.path.abspath(source)
+        return os.path.join(source if os.path.isdir(source) else os.path.dirname(source), ALIASES_FILE)
+    return os.path.join(os.path.abspath(cache_dir or CACHE_DIR), ALIASES_FILE)
+
+
+def load_aliases(path=None):
+    try:
+        with open(path or aliases_path(), encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        data = {}
+    data.setdefault("distinct", {})
+    for column in DEDUP_COLUMNS:
+        data.setdefault(column, {})
+        data["distinct"].setdefault(column, [])
+    return data
+
+
+def save_aliases(data, path=None):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=1, ensure_ascii=False, sort_keys=True)
+    path = path or aliases_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    _replace_atomic(path, write)
+
+
+def confirm_review(review, path=None):
+    """Record the reviewer's decisions in the alias file; returns the number recorded.
+
+    ``review`` is a review frame with a ``decision`` column: ``merge`` saves
+    the row's name as an alias of its canonical name, ``distinct`` keeps the
+    pair apart from now on. Rows with any other decision stay unconfirmed.
+    """
+    data = load_aliases(path)
+    recorded = 0
+    for row in review.itertuples(index=False):
+        decision = str(row.decision).strip().lower()
+        if decision not in DECISIONS or row.column not in DEDUP_COLUMNS:
+            continue
+        if decision == "merge":
+            data[row.column][row.name] = row.canonical
+        else:
+            if data[row.column].get(row.name) == row.canonical:
+                del data[row.column][row.name]
+            pair = sorted((row.name, row.canonical))
+            if pair not in data["distinct"][row.column]:
+                data["distinct"][row.column].append(pair)
+        recorded += 1
+    if recorded:
+        save_aliases(data, path)
+    return recorded
+
+
+def _label_counts(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(values.cat.categories))
+        return {str(c): int(n) for c, n in zip(values.cat.categories, counts) if n}
+    return {str(k): int(v) for k, v in Counter(values.dropna().astype(str)).items()}
+
+
+def _still_current(data, saved):
+    """True when the alias file ``saved`` holds nothing that the resolved ``data`` lacks."""
+    if data.get("distinct") != saved["distinct"]:
+        return False
+    return all(data.get(column, {}).get(v) == c for column in DEDUP_COLUMNS for v, c in saved[column].items())
+
+
+def resolve_aliases(df, path=None, columns=DEDUP_COLUMNS, previous=None):
+    """Alias map for the labels in ``df``: the saved aliases plus this table's fresh merges.
+
+    Returns ``(data, review)``: the structure of the alias file (one variant
+    -> canonical dict per column plus ``"distinct"``) with unconfirmed
+    merges added in memory only, and the review frame of every variant
+    folded in this table. Nothing is written; see ``confirm_review``.
+
+    ``previous`` is ``(data, review, table)`` as resolved for an earlier
+    version of the table. Its labels keep their names and only labels new
+    to ``df`` are clustered, unless the alias file has changed since.
+    """
+    data = load_aliases(path)
+    if previous is not None and not _still_current(previous[0], data):
+        previous = None
+    reviews = []
+    for column in columns:
+        if column not in df.columns:
+            continue
+        counts = _label_counts(df[column])
+        settled = fresh = None
+        if previous is not None and column in previous[2].columns:
+            review = previous[1]
+            settled = review[review["column"] == column]
+            fresh = set(counts).difference(_label_counts(previous[2][column]))
+        data[column], review = cluster_labels(counts, column, data[column], data["distinct"][column],
+                                              settled, fresh)
+        if len(review):
+            reviews.append(review)
+    review = pd.concat(reviews, ignore_index=True) if reviews else pd.DataFrame(columns=REVIEW_COLUMNS)
+    return data, review
+
+
+def canonicalize(df, data, columns=DEDUP_COLUMNS):
+    """``df`` with every aliased label replaced by its canonical name.
+
+    Categorical columns are remapped through their dictionary; only the
+    aliased columns get new buffers.
+    """
+    out = df.copy(deep=False)
+    for column in columns:
+        aliases = data.get(column) or {}
+        if column not in out.columns or not aliases:
+            continue
+        values = out[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            out[column] = values.map(lambda v: aliases.get(v, v) if isinstance(v, str) else v)
+            continue
+        mapped = pd.Index([aliases.get(c, c) for c in values.cat.categories.astype(str)])
+        if mapped.equals(values.cat.categories):
+            continue
+        categories = pd.Index(sorted(mapped.unique()))
+        lookup = np.append(categories.get_indexer(mapped), -1)
+        codes = values.cat.codes.to_numpy()
+        out[column] = pd.Categorical.from_codes(lookup[np.where(codes < 0, len(mapped), codes)],
+                                                categories=categories)
+    return out
+
+
+def same_canonical(before, after, df, columns=DEDUP_COLUMNS):
+    """True when alias maps ``before`` and ``after`` give every label of ``df`` the same name."""
+    for column in columns:
+        if column not in df.columns:
+            continue
+        old, new = before.get(column) or {}, after.get(column) or {}
+        if old == new:
+            continue
+        for label in _label_counts(df[column]):
+            if old.get(label, label) != new.get(label, label):
+                return False
+    return True
+
+
+def dedupe_names(df, path=None):
+    """``(canonical df, review frame)``: ``resolve_aliases`` followed by ``canonicalize``."""
+    data, review = resolve_aliases(df, path)
+    return canonicalize(df, data), review
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", default="cleaned_schedule.xlsx")
+    parser.add_argument("--aliases", default=None, help=f"alias map file (default {ALIASES_FILE} next to the workbook)")
+    parser.add_argument("--out", help="write the review table to this CSV file")
+    parser.add_argument("--apply", help="save the merge/distinct decisions of an edited review CSV")
+    args = parser.parse_args(argv)
+    path = args.aliases or aliases_path(args.source)
+
+    if args.apply:
+        recorded = confirm_review(pd.read_csv(args.apply, dtype=str, keep_default_na=False), path)
+        print(f"recorded {recorded} decisions in {path}")
+        return 0
+
+    df = load_and_clean(args.source)
+    if df is None:
+        parser.error(f"could not read {args.source}")
+    _, review = resolve_aliases(df, path)
+    for column in DEDUP_COLUMNS:
+        part = review[review["column"] == column]
+        before = len(_label_counts(df[column]))
+        print(f"{column}: {before} labels, {len(part)} folded into {part['canonical'].nunique()} names")
+        for row in part.itertuples(index=False):
+            print(f"  {row.name!r} -> {row.canonical!r} ({row.rule}, {row.score}, {row.rows} rows)")
+    if args.out:
+        review.assign(decision=np.where(review["rule"] == "alias file", "merge", "")).to_csv(args.out, index=False)
+        print(f"wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Hall occupancy at 5-minute resolution and free-slot search.
+
+``HallOccupancy`` scatters every session's [start, end) interval into a
+hall x day x slot array in one pass (a difference array plus a cumulative
+sum), so whether a hall is in use at any slot is a lookup.
+Utilization is measured over the teaching day (08:30-21:45 by default).
+Free-slot queries use per-row prefix sums of the busy mask: a window of k
+slots starting at s is free exactly when ``prefix[s + k] - prefix[s] == 0``,
+which is checked for every hall and start slot at once. After an edit to
+the schedule only the halls it touched are re-scattered (``apply_delta``).
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import VALID_DAYS
+from .conflicts import session_intervals
+
+SLOT_MINUTES = 5
+OPEN_FROM = 8 * 60 + 30
+OPEN_UNTIL = 21 * 60 + 45
+
+
+def format_minutes(m):
+    return f"{int(m) // 60:02d}:{int(m) % 60:02d}"
+
+
+class HallOccupancy:
+    def __init__(self, df, slot_minutes=SLOT_MINUTES):
+        self.slot_minutes = slot_minutes
+        self.n_slots = 24 * 60 // slot_minutes
+        self.days = VALID_DAYS
+
+        start, end, valid = session_intervals(df)
+        hall_codes, halls = pd.factorize(df["hall"].astype(str))
+        valid &= hall_codes >= 0
+        if "Unknown" in halls:
+            valid &= hall_codes != halls.get_loc("Unknown")
+        day_codes = pd.Categorical(df["days"], categories=VALID_DAYS).codes
+        valid &= day_codes >= 0
+
+        used, hall_codes = np.unique(hall_codes[valid], return_inverse=True)
+        self.halls = pd.Index(halls[used], name="hall")
+        days = day_codes[valid]
+        # Round outwards so a partially used slot counts as busy.
+        first = np.floor(start[valid] / slot_minutes).astype(np.intp)
+        last = np.ceil(end[valid] / slot_minutes).astype(np.intp)
+
+        diff = np.zeros((len(self.halls), len(self.days), self.n_slots + 1), dtype=np.int32)
+        np.add.at(diff, (hall_codes, days, first), 1)
+        np.add.at(diff, (hall_codes, days, last), -1)
+        np.cumsum(diff, axis=2, out=diff)
+        self.busy = diff[:, :, :-1] > 0
+        del diff
+
+        # Busy-slot counts before each slot; a day has at most 288 slots.
+        self.prefix = np.zeros(self.busy.shape[:2] + (self.n_slots + 1,), dtype=np.int16)
+        np.cumsum(self.busy, axis=2, out=self.prefix[:, :, 1:])
+
+    def apply_delta(self, df, halls):
+        """A new occupancy with the lanes of ``halls`` rebuilt from ``df``, the updated schedule.
+
+        Other halls' lanes are reused as they are; ``self`` is unchanged.
+        """
+        changed = HallOccupancy(df[df["hall"].isin(halls)], self.slot_minutes)
+        keep = ~self.halls.isin(halls)
+        out = copy.copy(self)
+        out.halls = self.halls[keep].append(changed.halls)
+        out.busy = np.concatenate([self.busy[keep], changed.busy])
+        out.prefix = np.concatenate([self.prefix[keep], changed.prefix])
+        return out
+
+    def slot(self, minute):
+        return int(minute) // self.slot_minutes
+
+    def _open_slots(self, open_from, open_until):
+        return slice(self.slot(open_from), -(-int(open_until) // self.slot_minutes))
+
+    def _active_days(self):
+        return np.flatnonzero(self.busy.any(axis=(0, 2)))
+
+    def utilization_by_hall(self, open_from=OPEN_FROM, open_until=OPEN_UNTIL):
+        """Share of open-hours slots each hall is in use, over the days that have classes."""
+        window = self.busy[:, self._active_days(), self._open_slots(open_from, open_until)]
+        pct = window.mean(axis=(1, 2)) * 100 if window.size else np.zeros(len(self.halls))
+        return pd.Series(pct, index=self.halls, name="utilization_pct").sort_values(ascending=False, kind="stable")
+
+    def utilization_by_time(self, open_from=OPEN_FROM, open_until=OPEN_UNTIL):
+        """Share of halls in use per slot of the day, averaged over the days that have classes."""
+        window = self._open_slots(open_from, open_until)
+        busy = self.busy[:, self._active_days(), window]
+        pct = busy.mean(axis=(0, 1)) * 100 if busy.size else np.zeros(0)
+        first = window.start
+        times = [format_minutes((first + i) * self.slot_minutes) for i in range(len(pct))]
+        return pd.DataFrame({"time": times, "utilization_pct": pct})
+
+    def free_halls(self, day, window_start, window_end, duration):
+        """Halls with ``duration`` free minutes on ``day`` inside [window_start, window_end).
+
+        Returns one row per hall with the earliest and latest feasible start
+        and the number of feasible start slots.
+        """
+        d = self.days.index(day)
+        k = -(-int(duration) // self.slot_minutes)
+        lo = -(-int(window_start) // self.slot_minutes)
+        hi = int(window_end) // self.slot_minutes - k
+        if k <= 0 or hi < lo:
+            return pd.DataFrame(columns=["hall", "earliest_start", "latest_start", "options"])
+
+        prefix = self.prefix[:, d, :]
+        starts = np.arange(lo, hi + 1)
+        free = (prefix[:, starts + k] - prefix[:, starts]) == 0
+        ok = free.any(axis=1)
+        earliest = starts[free.argmax(axis=1)]
+        latest = starts[free.shape[1] - 1 - free[:, ::-1].argmax(axis=1)]
+        return pd.DataFrame({
+            "hall": self.halls[ok],
+            "earliest_start": [format_minutes(s * self.slot_minutes) for s in earliest[ok]],
+            "latest_start": [format_minutes(s * self.slot_minutes) for s in latest[ok]],
+            "options": free.sum(axis=1)[ok],
+        })
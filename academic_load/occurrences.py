@@ -0,0 +1,247 @@
+"""Calendar expansion of the schedule into dated session occurrences.
+
+Each row is one weekly meeting on ``days`` during the period in
+``class_dates`` ("20.08.2025-10.12.2025"). Its occurrences are therefore an
+arithmetic progression: the first matching weekday on or after the start
+date, then every seven days up to the end date. Counts, per-week totals and
+date-window tests are computed from the two end points with datetime64
+arithmetic, so nothing loops over calendar days. Holidays remove the
+occurrences that fall on them; they are read from the file named by
+``SCHEDULE_HOLIDAYS`` (one ISO date per line, ``#`` starts a comment).
+``SessionCalendar.occurrences`` materializes the dated rows lazily, one
+chunk of schedule rows at a time.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import VALID_DAYS
+
+HOLIDAYS_ENV = "SCHEDULE_HOLIDAYS"
+CHUNK_ROWS = 10_000
+
+_DATE_RANGE = re.compile(r"^\s*(\d{1,2})\.(\d{1,2})\.(\d{4})\s*-\s*(\d{1,2})\.(\d{1,2})\.(\d{4})\s*$")
+_NAT = np.datetime64("NaT", "D")
+
+
+def _days(n):
+    return np.asarray(n, dtype=np.int64).astype("timedelta64[D]")
+
+
+def weekday(dates):
+    """Mon=0 .. Sun=6 for datetime64[D] values (1970-01-01 was a Thursday)."""
+    return (dates.astype(np.int64) + 3) % 7
+
+
+def week_number(dates):
+    """Weeks since Monday 1969-12-29; Monday of week ``w`` is day ``7 * w - 3``."""
+    return (dates.astype(np.int64) + 3) // 7
+
+
+def _parse_ranges(values):
+    parts = values.str.extract(_DATE_RANGE).astype(float)
+
+    def to_date(d, m, y):
+        ymd = pd.DataFrame({"year": parts[y], "month": parts[m], "day": parts[d]})
+        return pd.to_datetime(ymd, errors="coerce").to_numpy().astype("datetime64[D]")
+
+    if parts.empty:
+        return np.empty(0, "datetime64[D]"), np.empty(0, "datetime64[D]")
+    return to_date(0, 1, 2), to_date(3, 4, 5)
+
+
+def parse_class_dates(values):
+    """(start, end) datetime64[D] arrays for ``class_dates`` labels, NaT when unparseable.
+
+    Categorical columns are parsed once per category.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        start, end = _parse_ranges(pd.Series(values.cat.categories.astype(str)))
+        codes = values.cat.codes.to_numpy()
+        codes = np.where(codes < 0, len(start), codes)
+        return np.append(start, _NAT)[codes], np.append(end, _NAT)[codes]
+    return _parse_ranges(values.astype(str).reset_index(drop=True))
+
+
+def occurrence_bounds(df):
+    """First and last dated occurrence of every row (datetime64[D]).
+
+    Both are NaT when the row's dates or day are unknown; ``first > last``
+    means the period contains no such weekday.
+    """
+    start, end = parse_class_dates(df["class_dates"])
+    days = df["days"]
+    if isinstance(days.dtype, pd.CategoricalDtype) and tuple(days.cat.categories) == VALID_DAYS:
+        day = days.cat.codes.to_numpy().astype(np.int64)
+    else:
+        day = pd.Categorical(days, categories=VALID_DAYS).codes.astype(np.int64)
+    first = start + _days((day - weekday(start)) % 7)
+    last = end - _days((weekday(end) - day) % 7)
+    unknown = day < 0
+    first[unknown] = _NAT
+    last[unknown] = _NAT
+    return first, last
+
+
+def clip_bounds(first, last, start=None, end=None):
+    """Narrow occurrence bounds to the ones inside ``[start, end]`` (either may be None)."""
+    if start is not None:
+        behind = (np.datetime64(start, "D") - first).astype(np.int64)
+        first = np.where(behind > 0, first + _days(-(-behind // 7) * 7), first)
+    if end is not None:
+        ahead = (last - np.datetime64(end, "D")).astype(np.int64)
+        last = np.where(ahead > 0, last - _days(-(-ahead // 7) * 7), last)
+    return first, last
+
+
+def in_window(first, last, start=None, end=None):
+    """Rows with an occurrence in ``[start, end]``; rows with unknown dates are kept."""
+    lo, hi = clip_bounds(first, last, start, end)
+    return np.isnat(first) | (lo <= hi)
+
+
+def load_holidays(path):
+    dates = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                dates.append(np.datetime64(line, "D"))
+    return np.unique(np.array(dates, dtype="datetime64[D]"))
+
+
+def holidays_from_env(environ=None):
+    environ = os.environ if environ is None else environ
+    path = environ.get(HOLIDAYS_ENV)
+    return load_holidays(path) if path else np.empty(0, "datetime64[D]")
+
+
+class SessionCalendar:
+    """Dated occurrences of the schedule's rows, computed from their bounds.
+
+    ``bounds`` are the rows' ``occurrence_bounds`` when already known (a
+    ``FilterIndex`` holds them).
+    """
+
+    def __init__(self, df, holidays=(), bounds=None):
+        self.first, self.last = occurrence_bounds(df) if bounds is None else bounds
+        self.minutes = df["minutes"].to_numpy().astype(np.int64)
+        self.weekday = weekday(self.first)
+        self.holidays = np.unique(np.asarray(holidays, dtype="datetime64[D]"))
+
+    def __len__(self):
+        return len(self.first)
+
+    def span(self):
+        """(first, last) date with any occurrence, or None."""
+        ok = self.first <= self.last
+        if not ok.any():
+            return None
+        return self.first[ok].min(), self.last[ok].max()
+
+    def _spans(self, rows, start, end):
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        first, last = clip_bounds(self.first[rows], self.last[rows], start, end)
+        n = np.where(first <= last, (last - first).astype(np.int64) // 7 + 1, 0)
+        return rows, first, last, n
+
+    def _holiday_hits(self, rows, first, last):
+        """(holiday, rows it cancels) for every holiday inside the given bounds."""
+        if not len(self.holidays) or not len(rows):
+            return
+        ok = first <= last
+        if not ok.any():
+            return
+        lo, hi = first[ok].min(), last[ok].max()
+        days = self.weekday[rows]
+        for h in self.holidays[(self.holidays >= lo) & (self.holidays <= hi)]:
+            hit = (days == weekday(h)) & (first <= h) & (h <= last)
+            if hit.any():
+                yield h, hit
+
+    def counts(self, rows=None, start=None, end=None):
+        """Number of dated occurrences of each row inside ``[start, end]``."""
+        rows, first, last, n = self._spans(rows, start, end)
+        for _, hit in self._holiday_hits(rows, first, last):
+            n = n - hit
+        return n
+
+    def term_minutes(self, rows=None, start=None, end=None):
+        """Teaching minutes actually held by ``rows`` inside ``[start, end]``."""
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        return int((self.minutes[rows] * self.counts(rows, start, end)).sum())
+
+    def weekly_minutes(self, rows=None, start=None, end=None):
+        """Teaching minutes per calendar week, indexed by the week's Monday.
+
+        A row adds its minutes to every week from its first to its last
+        occurrence; this is one difference array over the week range, not
+        one entry per occurrence.
+        """
+        rows, first, last, n = self._spans(rows, start, end)
+        live = n > 0
+        if not live.any():
+            return pd.Series(dtype=np.int64, index=pd.DatetimeIndex([], name="week"), name="minutes")
+        wf, wl = week_number(first[live]), week_number(last[live])
+        minutes = self.minutes[rows][live]
+        base = wf.min()
+        size = wl.max() - base + 2
+        diff = (np.bincount(wf - base, weights=minutes, minlength=size)
+                - np.bincount(wl - base + 1, weights=minutes, minlength=size))
+        weekly = np.cumsum(diff)[:-1]
+        for h, hit in self._holiday_hits(rows, first, last):
+            weekly[week_number(h) - base] -= self.minutes[rows][hit].sum()
+        mondays = np.datetime64(0, "D") + _days(7 * (base + np.arange(len(weekly))) - 3)
+        index = pd.DatetimeIndex(mondays.astype("datetime64[ns]"), name="week")
+        return pd.Series(np.rint(weekly).astype(np.int64), index=index, name="minutes")
+
+    def group_weeks(self, groups, rows=None, start=None, end=None):
+        """Dated minutes and teaching weeks of every group (one instructor, one hall).
+
+        ``groups`` holds each schedule row's group code (negative = none).
+        Returns two arrays indexed by code: total minutes held inside
+        ``[start, end]`` and the number of calendar weeks with any of them,
+        from one difference array per group as in ``weekly_minutes``.
+        """
+        rows, first, last, n = self._spans(rows, start, end)
+        codes = np.asarray(groups)[rows]
+        size_g = int(codes.max()) + 1 if len(codes) else 0
+        live = (n > 0) & (codes >= 0)
+        if not live.any():
+            return np.zeros(size_g, dtype=np.int64), np.zeros(size_g, dtype=np.int64)
+        wf, wl = week_number(first[live]), week_number(last[live])
+        minutes, code = self.minutes[rows][live], codes[live]
+        base = wf.min()
+        size = wl.max() - base + 2
+        diff = (np.bincount(code * size + wf - base, weights=minutes, minlength=size_g * size)
+                - np.bincount(code * size + wl - base + 1, weights=minutes, minlength=size_g * size))
+        weekly = np.cumsum(diff.reshape(size_g, size), axis=1)[:, :-1]
+        for h, hit in self._holiday_hits(rows, first, last):
+            hit &= live
+            np.subtract.at(weekly[:, week_number(h) - base], codes[hit], self.minutes[rows][hit])
+        weekly = np.rint(weekly).astype(np.int64)
+        return weekly.sum(axis=1), (weekly > 0).sum(axis=1)
+
+    def occurrences(self, rows=None, start=None, end=None, chunk_rows=CHUNK_ROWS):
+        """Yield ``(row, date)`` frames of dated occurrences, ``chunk_rows`` schedule rows at a time.
+
+        A holiday removes the one occurrence it falls on in each row it
+        cancels (``_holiday_hits``), so the expanded dates are never
+        compared with the holiday list.
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        for i in range(0, len(rows), chunk_rows):
+            part, first, last, n = self._spans(rows[i:i + chunk_rows], start, end)
+            offsets = np.cumsum(n) - n
+            step = np.arange(n.sum()) - np.repeat(offsets, n)
+            dates = np.repeat(first, n) + _days(7 * step)
+            part = np.repeat(part, n)
+            holes = [offsets[hit] + (h - first[hit]).astype(np.int64) // 7
+                     for h, hit in self._holiday_hits(rows[i:i + chunk_rows], first, last)]
+            if holes:
+                keep = np.ones(len(dates), dtype=bool)
+                keep[np.concatenate(holes)] = False
+                part, dates = part[keep], dates[keep]
+            yield pd.DataFrame({"row": part, "date": dates.astype("datetime64[ns]")})
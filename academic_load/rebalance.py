@@ -0,0 +1,191 @@
+"""Workload rebalancing: propose section reassignments within a faculty.
+
+    python -m academic_load.rebalance [workbook.xlsx] --faculty NAME [--budget 2.0] [--out plan.csv]
+
+A section (``code`` + ``section``, all its weekly meetings) is moved as a
+whole from one instructor of the faculty to another who already teaches in
+it. The load of an instructor is the weekly minutes of all their sessions,
+the same figure the dashboard's workload charts use. Moving ``m`` minutes
+from load ``a`` to load ``b`` lowers the sum of squared loads by
+``2m(a - b - m)``, so only moves with ``m < a - b`` are considered; each
+round takes the most loaded instructor with such a move and gives the
+section that gains most to the least loaded instructor who is free at all
+its meeting times. Every move lowers the variance and never raises the
+maximum. The search stops when no move helps, after ``max_moves`` or when
+``time_budget`` seconds have passed.
+
+Free means no same-day overlap (half-open, as in ``conflicts``) with any of
+the receiving instructor's sessions in any faculty whose teaching period
+overlaps. Sections with an unknown instructor, no parsed times or no
+minutes stay where they are.
+"""
+import argparse
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .cache import load_and_clean
+from .conflicts import session_intervals
+from .names import aliases_path, dedupe_names
+
+UNASSIGNED = "Unknown"
+
+
+class RebalancePlan(NamedTuple):
+    moves: pd.DataFrame    # one row per reassigned section, in the order chosen
+    before: pd.Series      # weekly minutes per instructor of the faculty
+    after: pd.Series
+    seconds: float
+    converged: bool        # False when the budget or the move limit cut the search short
+
+    def summary(self):
+        return {
+            "instructors": len(self.before),
+            "moves": len(self.moves),
+            "max_before": int(self.before.max()) if len(self.before) else 0,
+            "max_after": int(self.after.max()) if len(self.after) else 0,
+            "std_before": float(self.before.std(ddof=0)) if len(self.before) else 0.0,
+            "std_after": float(self.after.std(ddof=0)) if len(self.after) else 0.0,
+            "seconds": self.seconds,
+            "converged": self.converged,
+        }
+
+
+def _section_keys(df):
+    if "section" in df.columns:
+        return list(zip(df["code"].astype(str), df["section"].astype(str)))
+    return [(str(code), str(i)) for i, code in enumerate(df["code"])]
+
+
+class _Timetable:
+    """Per-instructor meeting rows, checked for clashes with plain array tests."""
+
+    def __init__(self, df):
+        self.start, self.end, self.valid = session_intervals(df)
+        self.day = pd.Categorical(df["days"]).codes
+        if "start_date" in df.columns and "end_date" in df.columns:
+            self.first = df["start_date"].to_numpy()
+            self.last = df["end_date"].to_numpy()
+        else:
+            self.first = self.last = None
+        self.rows = {}
+        for name, rows in pd.Series(np.arange(len(df))).groupby(df["instructor"].to_numpy()).groups.items():
+            self.rows[name] = set(rows.tolist())
+
+    def free(self, name, rows):
+        """True when ``name`` can take the meetings in ``rows`` without a clash."""
+        busy = np.fromiter(self.rows.get(name, ()), dtype=np.intp)
+        busy = busy[self.valid[busy]]
+        if not len(busy):
+            return True
+        for r in rows:
+            clash = (self.day[busy] == self.day[r]) & (self.start[busy] < self.end[r]) & (self.start[r] < self.end[busy])
+            if self.first is not None:
+                apart = (self.last[busy] < self.first[r]) | (self.last[r] < self.first[busy])
+                clash &= ~apart
+            if clash.any():
+                return False
+        return True
+
+    def move(self, rows, source, target):
+        self.rows[source].difference_update(rows)
+        self.rows.setdefault(target, set()).update(rows)
+
+
+def rebalance(df, faculty, time_budget=2.0, max_moves=500):
+    """Propose section moves that flatten instructor load within ``faculty``."""
+    t0 = time.perf_counter()
+    instructor = df["instructor"].astype(str).to_numpy()
+    in_faculty = (df["department"].astype(str) == faculty).to_numpy()
+    names = sorted(set(instructor[in_faculty]) - {UNASSIGNED})
+    minutes = df["minutes"].to_numpy().astype(np.int64)
+    totals = pd.Series(minutes).groupby(instructor).sum()
+    load = {name: int(totals.get(name, 0)) for name in names}
+    before = pd.Series(load, name="minutes", dtype=np.int64)
+    before.index.name = "instructor"
+
+    table = _Timetable(df)
+    keys = _section_keys(df)
+    sections = {}
+    for r in np.flatnonzero(in_faculty):
+        if instructor[r] in load:
+            sections.setdefault((keys[r], instructor[r]), []).append(r)
+    owned = {name: [] for name in names}
+    for (key, name), rows in sections.items():
+        m = int(minutes[rows].sum())
+        if m > 0 and table.valid[rows].all():
+            owned[name].append((key, rows, m))
+
+    moves = []
+    converged = False
+    while len(moves) < max_moves and time.perf_counter() - t0 < time_budget:
+        order = sorted(names, key=lambda n: (-load[n], n))
+        receivers = order[::-1]
+        best = None
+        for source in order:
+            for i, (key, rows, m) in enumerate(owned[source]):
+                for target in receivers:
+                    if load[target] + m >= load[source]:
+                        break
+                    if target != source and table.free(target, rows):
+                        gain = m * (load[source] - load[target] - m)
+                        if best is None or gain > best[0]:
+                            best = (gain, source, i, target)
+                        break
+            if best is not None:
+                break
+        if best is None:
+            converged = True
+            break
+        _, source, i, target = best
+        key, rows, m = owned[source].pop(i)
+        owned[target].append((key, rows, m))
+        table.move(rows, source, target)
+        moves.append({
+            "code": key[0], "section": key[1],
+            "course_title": str(df["course_title"].iloc[rows[0]]),
+            "days": " ".join(dict.fromkeys(str(d) for d in df["days"].iloc[rows])),
+            "minutes": m, "from": source, "to": target,
+            "from_minutes_after": load[source] - m, "to_minutes_after": load[target] + m,
+        })
+        load[source] -= m
+        load[target] += m
+
+    after = pd.Series(load, name="minutes", dtype=np.int64).reindex(before.index)
+    moves = pd.DataFrame(moves, columns=[
+        "code", "section", "course_title", "days", "minutes", "from", "to",
+        "from_minutes_after", "to_minutes_after",
+    ])
+    return RebalancePlan(moves, before, after, time.perf_counter() - t0, converged)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", default="cleaned_schedule.xlsx")
+    parser.add_argument("--faculty", required=True)
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds")
+    parser.add_argument("--max-moves", type=int, default=500)
+    parser.add_argument("--out", help="write the proposed moves to this CSV file")
+    args = parser.parse_args(argv)
+
+    df = load_and_clean(args.source)
+    if df is None:
+        parser.error(f"could not read {args.source}")
+    df, _ = dedupe_names(df, aliases_path(args.source))
+    plan = rebalance(df, args.faculty, args.budget, args.max_moves)
+    s = plan.summary()
+    print(f"{s['instructors']} instructors, {s['moves']} moves in {s['seconds']:.2f}s"
+          f"{'' if s['converged'] else ' (stopped early)'}")
+    print(f"max load {s['max_before'] / 60:.1f} h -> {s['max_after'] / 60:.1f} h/week, "
+          f"std {s['std_before'] / 60:.2f} h -> {s['std_after'] / 60:.2f} h")
+    if args.out:
+        plan.moves.to_csv(args.out, index=False)
+        print(f"wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
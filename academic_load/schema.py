@@ -0,0 +1,73 @@
+"""Compact in-memory schema for the cleaned session table.
+
+Label columns become categoricals (one shared dictionary per column, int8/int16
+codes), ``days`` gets a fixed Mon..Sun dictionary plus a ``day_code`` uint8
+column, ``minutes`` is int16 and ``start_hour`` float32. Groupbys on the
+categoricals run on the integer codes.
+"""
+import numpy as np
+import pandas as pd
+
+from .cleaning import VALID_DAYS
+
+# Part of the on-disk cache key; bump when compact_schedule's output changes.
+SCHEMA_VERSION = 1
+
+LABEL_COLUMNS = ("instructor", "hall", "course_title", "department")
+
+# Other string columns are dictionary-encoded when they repeat this much.
+CATEGORY_MAX_RATIO = 0.5
+
+
+def compact_schedule(df):
+    df = df.copy()
+    for col in LABEL_COLUMNS:
+        df[col] = df[col].astype("category")
+
+    df["days"] = pd.Categorical(df["days"], categories=VALID_DAYS)
+    df["day_code"] = df["days"].cat.codes.astype(np.uint8)
+
+    info = np.iinfo(np.int16)
+    df["minutes"] = df["minutes"].clip(info.min, info.max).astype(np.int16)
+    df["start_hour"] = df["start_hour"].astype(np.float32)
+
+    for col in df.columns:
+        if df[col].dtype == object and df[col].nunique() <= CATEGORY_MAX_RATIO * max(len(df), 1):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _read_only(arr):
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+
+def freeze(df):
+    """A frame over read-only views of ``df``'s column buffers; no data is copied.
+
+    Writes through the returned frame raise instead of changing data that
+    other sessions are reading; operations that derive new frames are
+    unaffected.
+    """
+    columns = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            columns[col] = pd.Categorical.from_codes(_read_only(s.cat.codes.to_numpy()), dtype=s.dtype, validate=False)
+        elif isinstance(s.dtype, np.dtype):
+            columns[col] = _read_only(s.to_numpy())
+        else:
+            columns[col] = s.array
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def memory_report(before, after):
+    """Per-column deep memory usage (bytes) of two frames, with a total row."""
+    report = pd.DataFrame({
+        "before": before.memory_usage(deep=True, index=False),
+        "after": after.memory_usage(deep=True, index=False),
+    })
+    report.loc["total"] = report.sum()
+    report["ratio"] = (report["after"] / report["before"]).round(3)
+    return report
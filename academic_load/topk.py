@@ -0,0 +1,53 @@
+"""Top-K selection for the ranking panels without sorting whole aggregates.
+
+``top_positions`` finds the k-th largest value with ``np.partition`` (linear
+time), keeps every entry at or above it and sorts only those, so asking for
+the top 200 of a large rollup costs one pass plus a sort of about 200
+values. Ties are broken by position, and rollups come out of ``groupby`` in
+label order, so equal totals always rank alphabetically and the same filter
+gives the same table on every run. ``top_per_group`` ranks inside groups
+(the top instructors of each faculty) with one lexsort over the grouped
+values instead of a filter-and-sort per group.
+"""
+import numpy as np
+
+
+def top_positions(values, k):
+    """Positions of the ``k`` largest ``values``, largest first; ties keep position order."""
+    values = np.asarray(values)
+    n = len(values)
+    k = max(0, min(int(k), n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        kth = np.partition(values, n - k)[n - k]
+        candidates = np.flatnonzero(values >= kth)
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -values[candidates].astype(np.float64)))
+    return candidates[order[:k]]
+
+
+def top_series(series, k, name=None):
+    """The ``k`` largest entries of ``series`` as a frame (index levels + value column)."""
+    top = series.iloc[top_positions(series.to_numpy(), k)]
+    return top.rename(name or series.name).reset_index()
+
+
+def top_per_group(groups, values, k):
+    """Positions of the ``k`` largest ``values`` within each group, in group order.
+
+    ``groups`` are integer group ranks (negative = leave out); the result
+    lists group 0's entries largest first, then group 1's, and so on.
+    """
+    groups = np.asarray(groups)
+    values = np.asarray(values, dtype=np.float64)
+    live = np.flatnonzero(groups >= 0)
+    order = live[np.lexsort((live, -values[live], groups[live]))]
+    ranked = groups[order]
+    if not len(ranked):
+        return order
+    starts = np.flatnonzero(np.r_[True, ranked[1:] != ranked[:-1]])
+    rank = np.arange(len(ranked)) - np.repeat(starts, np.diff(np.r_[starts, len(ranked)]))
+    return order[rank < k]
+
@@ -0,0 +1,64 @@
+"""Show that archive ingestion memory stays flat as terms accumulate.
+
+    python benchmarks/bench_archive.py [--terms 8] [--rows 100000] [--chunk-rows 50000]
+
+Writes ``--terms`` synthetic CSV terms, then ingests them into a fresh store
+one term at a time, reporting the time and tracemalloc peak of each
+``ingest`` call next to the store's total size. The peak should track the
+chunk size, not the number of terms already stored, and each call should
+only read its own term. Finally it reads the whole store back.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from academic_load.archive import ingest, list_terms, read_store  # noqa: E402
+from synthetic import make_schedule  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench-archive-")
+    try:
+        sources = []
+        for i in range(args.terms):
+            path = os.path.join(tmp, f"term-{i + 1:02d}.csv")
+            make_schedule(args.rows, seed=i).to_csv(path, index=False)
+            sources.append(path)
+
+        store = os.path.join(tmp, "store")
+        print(f"{args.terms} terms x {args.rows} rows, chunks of {args.chunk_rows}")
+        print(f"{'terms':>5} {'seconds':>8} {'peak MB':>8} {'store MB':>9}")
+        for i, path in enumerate(sources, 1):
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            ingest(sources[:i], store, chunk_rows=args.chunk_rows, log=lambda msg: None)
+            seconds = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = sum(os.path.getsize(os.path.join(store, f)) for f in os.listdir(store))
+            print(f"{i:5d} {seconds:8.2f} {peak / 2**20:8.1f} {size / 2**20:9.1f}")
+
+        t0 = time.perf_counter()
+        df = read_store(store)
+        print(f"read_store: {len(df)} rows from {len(list_terms(store))} terms in "
+              f"{time.perf_counter() - t0:.2f}s, {df.memory_usage(deep=True).sum() / 2**20:.1f} MB in memory")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
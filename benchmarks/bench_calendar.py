@@ -0,0 +1,104 @@
+"""Time the calendar expansion on a full academic year of synthetic sessions.
+
+    python benchmarks/bench_calendar.py [--rows 1000000] [--holidays 12]
+
+The synthetic schedule's fall terms are copied into spring and summer terms
+so the table spans a year, and a few weekday holidays are added. The script
+times building the ``SessionCalendar``, per-row occurrence counts, weekly
+totals, a date-window filter and streaming every dated occurrence through
+``occurrences``. The weekly totals are checked against a groupby over the
+streamed occurrences, and the stream's tracemalloc peak is reported next to
+the size the fully expanded table would have.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from academic_load.cleaning import clean_schedule  # noqa: E402
+from academic_load.filter_index import FilterIndex, make_spec  # noqa: E402
+from academic_load.occurrences import SessionCalendar  # noqa: E402
+from academic_load.schema import compact_schedule  # noqa: E402
+from synthetic import make_schedule  # noqa: E402
+
+# Fall term label -> labels of the same pattern later in the year.
+YEAR_TERMS = {
+    "20.08.2025-10.12.2025": ["12.01.2026-08.05.2026", "25.05.2026-31.07.2026"],
+    "16.08.2025-14.09.2025": ["10.01.2026-08.02.2026", "01.06.2026-28.06.2026"],
+    "08.09.2025-24.10.2025": ["02.02.2026-20.03.2026", "06.07.2026-14.08.2026"],
+}
+
+
+def full_year(n_rows, seed):
+    raw = make_schedule(n_rows, seed=seed)
+    term = np.random.default_rng(seed).integers(0, 3, len(raw))
+    later = raw["class_dates"].map(lambda label: YEAR_TERMS.get(label, [label, label]))
+    for k in (1, 2):
+        mask = term == k
+        raw.loc[mask, "class_dates"] = later[mask].str[k - 1]
+    return compact_schedule(clean_schedule(raw))
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--holidays", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    df = full_year(args.rows, args.seed)
+    rng = np.random.default_rng(args.seed)
+    days = np.arange(np.datetime64("2025-08-16"), np.datetime64("2026-08-14"))
+    holidays = np.sort(rng.choice(days, size=args.holidays, replace=False))
+    print(f"{len(df)} sessions, {df['class_dates'].nunique()} class date ranges, {len(holidays)} holidays")
+
+    cal, t_build = timed(lambda: SessionCalendar(df, holidays))
+    counts, t_counts = timed(cal.counts)
+    weekly, t_weekly = timed(cal.weekly_minutes)
+    index = FilterIndex(df)
+    spec = make_spec(dates=("2026-03-01", "2026-03-31"))
+    rows, t_filter = timed(lambda: index.select(spec))
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    n_occ, by_week = 0, []
+    minutes = df["minutes"].to_numpy()
+    for chunk in cal.occurrences():
+        n_occ += len(chunk)
+        week = chunk["date"] - pd.to_timedelta(chunk["date"].dt.weekday, unit="D")
+        by_week.append(pd.Series(minutes[chunk["row"].to_numpy()]).groupby(week.to_numpy()).sum())
+    t_stream = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    streamed = pd.concat(by_week).groupby(level=0).sum()
+    streamed.index.name = "week"
+    same = weekly[weekly != 0].astype(np.int64).equals(streamed[streamed != 0].astype(np.int64).rename("minutes"))
+    expanded_mb = n_occ * (8 + 8) / 2 ** 20
+
+    print(f"{'build':>18} {t_build * 1000:9.1f} ms")
+    print(f"{'counts':>18} {t_counts * 1000:9.1f} ms  ({counts.sum()} occurrences)")
+    print(f"{'weekly totals':>18} {t_weekly * 1000:9.1f} ms  ({len(weekly)} weeks)")
+    print(f"{'date filter':>18} {t_filter * 1000:9.1f} ms  ({len(rows)} rows meet in March 2026)")
+    print(f"{'stream occurrences':>18} {t_stream * 1000:9.1f} ms  (peak {peak / 2 ** 20:.0f} MB; "
+          f"fully expanded row/date table {expanded_mb:.0f} MB)")
+    print(f"weekly totals match the streamed occurrences: {same}")
+    return 0 if same and n_occ == counts.sum() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
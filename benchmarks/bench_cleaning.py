@@ -0,0 +1,128 @@
+"""Check the vectorized cleaning engine against the original row-wise rules and time both.
+
+    python benchmarks/bench_cleaning.py [workbook.xlsx] [--repeat N] [--scale K]
+
+``--scale`` tiles the workbook K times to approximate a multi-semester file.
+Exits non-zero if the two implementations disagree.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from academic_load.cleaning import FACULTY_MAP, clean_schedule, read_schedule, to_columnar  # noqa: E402
+
+
+def clean_schedule_rowwise(df):
+    """The pre-vectorization cleaning rules, kept verbatim as the reference."""
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip().str.replace(r"\s+", "_", regex=True).str.lower()
+
+    expected = {
+        "course_title": "", "code": "", "class_dates": "", "class_times": "",
+        "days": "", "hall": "", "instructor": "", "minutes": 0,
+        "start_time": "", "end_time": "", "department": ""
+    }
+    for k, v in expected.items():
+        if k not in df.columns:
+            df[k] = v
+
+    df["minutes"] = pd.to_numeric(df["minutes"], errors="coerce").fillna(0).astype(int)
+
+    valid_days = {"Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"}
+    def normalize_day(raw):
+        if pd.isna(raw):
+            return np.nan
+        s = str(raw).strip()
+        s_cap = s.capitalize()
+        mapping = {"M": "Mon", "T": "Tue", "W": "Wed", "R": "Thu", "F": "Fri", "S": "Sat", "Su": "Sun"}
+        if s_cap in valid_days:
+            return s_cap
+        if s in mapping:
+            return mapping[s]
+        return np.nan
+
+    df["days_clean"] = df["days"].apply(normalize_day)
+    df = df[~df["days_clean"].isna()].copy()
+    df["days"] = df["days_clean"]
+    df.drop(columns=["days_clean"], inplace=True)
+
+    def parse_hour(x):
+        try:
+            t = pd.to_datetime(str(x), errors="coerce")
+            if pd.isna(t):
+                return np.nan
+            return t.hour + t.minute / 60.0
+        except Exception:
+            return np.nan
+
+    df["start_hour"] = df["start_time"].apply(parse_hour)
+
+    df["instructor"] = df["instructor"].astype(str).replace({"nan": ""}).str.strip().replace({"": "Unknown"})
+    df["hall"] = df["hall"].astype(str).replace({"nan": ""}).str.strip().replace({"": "Unknown"})
+    df["course_title"] = df["course_title"].astype(str).replace({"nan": ""}).str.strip().replace({"": "Unknown"})
+
+    def extract_faculty(code_str):
+        if pd.isna(code_str) or str(code_str).strip() == "":
+            return "Unknown"
+        match = re.match(r'^([A-Z]+)', str(code_str).strip())
+        if not match:
+            return "Unknown"
+        return FACULTY_MAP.get(match.group(1), "Other")
+
+    df["department"] = df["code"].apply(extract_faculty)
+    return to_columnar(df.reset_index(drop=True))
+
+
+def edge_cases():
+    """Hand-written rows covering every branch of the day, time and code rules."""
+    return pd.DataFrame({
+        "Code": ["ACC2102", " fin101", "XYZ1", "", None, "MATH 1", "12AB", "LAW"],
+        "Days": ["mon", "S", "Su", "St", None, " R ", "TUESDAY", "thu"],
+        "Start Time": ["13:00:00", "08:30", "1:15 PM", None, "24:00", "25:99", "07:05:59", "garbage"],
+        "Instructor": ["  Smith ", None, "", "A", "B", "C", "D", "E"],
+        "Hall": [np.nan, "#1", " ", "x", "y", "z", "w", "v"],
+        "Course Title": ["a", "b", "c", "d", "e", "f", "g", "h"],
+        "Minutes": [75, "50", "x", None, 0, 1, 2, 3],
+    })
+
+
+def timed(fn, raw, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(raw)
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("workbook", nargs="?", default="cleaned_schedule.xlsx")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    ref = clean_schedule_rowwise(edge_cases())
+    new = clean_schedule(edge_cases())
+    pd.testing.assert_frame_equal(new, ref)
+
+    raw = read_schedule(args.workbook)
+    raw = pd.concat([raw] * args.scale, ignore_index=True)
+    ref, t_ref = timed(clean_schedule_rowwise, raw, args.repeat)
+    new, t_new = timed(clean_schedule, raw, args.repeat)
+    pd.testing.assert_frame_equal(new, ref)
+
+    print(f"rows={len(raw)} equivalent=yes")
+    print(f"row-wise   {t_ref * 1000:9.1f} ms")
+    print(f"vectorized {t_new * 1000:9.1f} ms  ({t_ref / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
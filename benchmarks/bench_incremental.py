@@ -0,0 +1,104 @@
+"""Time incremental re-ingestion against a full rebuild for edits of different sizes.
+
+    python benchmarks/bench_incremental.py [--rows N] [--changes 10 100 1000]
+
+Each round edits a synthetic workbook (half the changed rows modified, a
+quarter deleted, a quarter appended), then times ``ScheduleStore.refresh()``
+with the filter index, session calendar, hall occupancy and conflict table
+already built, against cleaning the new workbook and rebuilding all four
+from scratch. Both
+paths pay the same workbook parse, so it is timed once on its own and both
+paths are handed the parsed frame. The refreshed table is checked against
+the rebuilt one.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from academic_load import incremental  # noqa: E402
+from academic_load.cleaning import clean_schedule, read_schedule  # noqa: E402
+from academic_load.incremental import ScheduleState, ScheduleStore  # noqa: E402
+from academic_load.schema import compact_schedule  # noqa: E402
+from synthetic import make_schedule  # noqa: E402
+
+
+def edit(raw, k, rng):
+    raw = raw.copy()
+    changed = rng.choice(len(raw), size=k // 2, replace=False)
+    raw.loc[raw.index[changed], "minutes"] = raw["minutes"].iloc[changed] + 5
+    raw = raw.drop(index=raw.index[rng.choice(len(raw), size=k // 4, replace=False)])
+    extra = make_schedule(k - k // 2 - k // 4, seed=int(rng.integers(1 << 30)))
+    return pd.concat([raw, extra], ignore_index=True)
+
+
+def build_all(state):
+    state.index, state.calendar, state.occupancy, state.conflicts
+    return state
+
+
+def same_values(a, b):
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for col in a.columns:
+        x, y = a[col].astype(object), b[col].astype(object)
+        if not ((x == y) | (x.isna() & y.isna())).all():
+            return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--changes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    tmp = tempfile.mkdtemp(prefix="bench-incremental-")
+    try:
+        path = os.path.join(tmp, "schedule.xlsx")
+        raw = make_schedule(args.rows, seed=args.seed)
+        raw.to_excel(path, index=False)
+        store = ScheduleStore(path, cache_dir=os.path.join(tmp, "cache"))
+        build_all(store.state)
+        print(f"rows={len(raw)}")
+        print(f"{'changed':>8} {'parse':>9} {'refresh':>9} {'rebuild':>9}  added removed  equal")
+        for k in args.changes:
+            raw = edit(raw, k, rng)
+            raw.to_excel(path, index=False)
+
+            t0 = time.perf_counter()
+            parsed = read_schedule(path)
+            t_parse = time.perf_counter() - t0
+
+            # Both paths start from the same parsed frame.
+            incremental.read_schedule = lambda source: parsed.copy()
+            t0 = time.perf_counter()
+            delta = store.refresh()
+            build_all(store.state)
+            t_refresh = time.perf_counter() - t0
+            incremental.read_schedule = read_schedule
+
+            t0 = time.perf_counter()
+            full = build_all(ScheduleState(compact_schedule(clean_schedule(parsed.copy()))))
+            t_rebuild = time.perf_counter() - t0
+
+            print(f"{k:8d} {t_parse * 1000:7.0f}ms {t_refresh * 1000:7.0f}ms {t_rebuild * 1000:7.0f}ms"
+                  f"  {len(delta.added):5d} {len(delta.removed):7d}  {same_values(store.state.df, full.df)}"
+                  f"{'  (full rebuild)' if delta.full else ''}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
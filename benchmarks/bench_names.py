@@ -0,0 +1,118 @@
+"""Time fuzzy name de-duplication and score it against known variants.
+
+    python benchmarks/bench_names.py [--people 1000 10000 50000] [--variants 0.3] [--seed 11]
+
+Builds instructor labels for synthetic people ("First Last, Ph.D.") and
+adds misspelled copies for a share of them: "Last, First" order, another
+degree, upper case, a middle initial or one changed letter in the surname.
+For each size the script reports the clustering time, the number of label
+pairs actually compared next to the all-pairs count, and pairwise precision
+and recall of the merges against the true people. It then checks fixed pairs
+that must stay apart (different initials, given names one letter apart,
+short surnames one letter apart, swapped name order, an added surname) and
+pairs that must merge, and fails if any goes the wrong way.
+"""
+import argparse
+import os
+import string
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from academic_load.names import candidate_pairs, cluster_labels, name_key  # noqa: E402
+
+SYLLABLES = ["a", "ai", "ba", "bek", "da", "gul", "ka", "lan", "ma", "mir", "na", "nur", "ra", "sa", "sul",
+             "ta", "tan", "u", "zha", "zhan", "as", "er", "ol", "im", "ar", "dos", "kha", "li", "ye", "sen"]
+DEGREES = ["Ph.D.", "PhD", "MA", "MSc", "MBA"]
+DISTINCT = [("Ospanov, A", "Ospanov, B."), ("Kim, D.", "Kim, S."), ("Kim A.", "Kim B."),
+            ("Smith, JOHN", "Smith, JANE"), ("Murat Sultanov", "Marat Sultanov"),
+            ("Aigerim Ospanova, MA", "Aigerim Ospanov, MA"), ("John Lee", "John Lei"), ("Li Wei", "Wei Li"),
+            ("Anna Kim", "Anna Kim Lee")]
+SAME = [("Smith, JOHN", "John Smith, Ph.D."), ("Marat Sultanov, PhD", "Marat Sultanow"),
+        ("Dinara Karimova, M.Ed., MA in FL", "Dinara Karimova"), ("Kim, D.", "D. Kim, MBA"),
+        ("John Smith", "John Paul Smith")]
+
+
+def _word(rng, parts):
+    return "".join(rng.choice(SYLLABLES, size=parts)).capitalize()
+
+
+def make_names(n_people, share, seed):
+    """(label -> row count, label -> person) for ``n_people`` people and their variants."""
+    rng = np.random.default_rng(seed)
+    firsts = sorted({_word(rng, 2) for _ in range(400)})
+    people = set()
+    while len(people) < n_people:
+        people.add((str(rng.choice(firsts)), _word(rng, int(rng.integers(3, 5))) + str(rng.choice(["ova", "ov", "uly", "kyzy", "in"]))))
+    people = sorted(people)
+    truth = {}
+    for pid, (first, last) in enumerate(people):
+        truth[f"{first} {last}, {rng.choice(DEGREES)}"] = pid
+        if rng.random() >= share:
+            continue
+        kind = rng.integers(0, 5)
+        if kind == 0:
+            variant = f"{last}, {first}"
+        elif kind == 1:
+            variant = f"{first} {last} {rng.choice(['PhD', 'MA', 'MBA'])}"
+        elif kind == 2:
+            variant = f"{first} {last}".upper()
+        elif kind == 3:
+            variant = f"{first} {rng.choice(list(string.ascii_uppercase))}. {last}, Ph.D."
+        else:
+            i = int(rng.integers(1, len(last)))
+            variant = f"{first} {last[:i]}{rng.choice(list('aeiou'))}{last[i + 1:]}"
+        truth.setdefault(variant, pid)
+    counts = {label: int(rng.integers(1, 40)) for label in truth}
+    return counts, truth
+
+
+def pairs(sizes):
+    sizes = np.asarray(sizes, dtype=np.int64)
+    return int((sizes * (sizes - 1) // 2).sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--people", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--variants", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+
+    print(f"{'people':>7} {'labels':>7} {'seconds':>8} {'compared':>10} {'all pairs':>13} {'precision':>9} {'recall':>7}")
+    ok = True
+    for n in args.people:
+        counts, truth = make_names(n, args.variants, args.seed)
+        t0 = time.perf_counter()
+        aliases, _ = cluster_labels(counts)
+        seconds = time.perf_counter() - t0
+        compared = sum(1 for _ in candidate_pairs({name_key(label) for label in counts}))
+
+        frame = pd.DataFrame({"person": list(truth.values()),
+                              "cluster": [aliases.get(label, label) for label in truth]})
+        both = pairs(frame.groupby(["cluster", "person"]).size())
+        merged = pairs(frame.groupby("cluster").size())
+        same = pairs(frame.groupby("person").size())
+        precision = both / merged if merged else 1.0
+        recall = both / same if same else 1.0
+        total = len(counts) * (len(counts) - 1) // 2
+        print(f"{n:7d} {len(counts):7d} {seconds:8.2f} {compared:10d} {total:13d} {precision:9.3f} {recall:7.3f}")
+        ok &= precision >= 0.95
+
+    for expected, cases in ((False, DISTINCT), (True, SAME)):
+        for a, b in cases:
+            aliases, _ = cluster_labels({a: 2, b: 1})
+            merged = bool(aliases)
+            ok &= merged == expected
+            print(f"{'merge' if expected else 'apart'}: {a!r} / {b!r}: {'merged' if merged else 'apart'}"
+                  f"{'' if merged == expected else '  WRONG'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
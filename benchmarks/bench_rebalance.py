@@ -0,0 +1,63 @@
+"""Time the workload rebalancer on the largest faculty of synthetic schedules.
+
+    python benchmarks/bench_rebalance.py [--sizes 2000 5000 20000] [--budget 5] [--max-moves 500]
+
+For each size the plan is applied to a copy of the schedule, and the
+script checks that instructor clashes did not increase and that the
+reported loads match the reassigned table.
+"""
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from academic_load.cleaning import clean_schedule  # noqa: E402
+from academic_load.conflicts import find_conflicts  # noqa: E402
+from academic_load.rebalance import rebalance  # noqa: E402
+from academic_load.schema import compact_schedule  # noqa: E402
+from synthetic import make_schedule  # noqa: E402
+
+
+def apply_plan(df, faculty, moves):
+    out = df.copy()
+    out["instructor"] = out["instructor"].astype(str)
+    key = out["code"].astype(str) + "\x1f" + out["section"].astype(str)
+    in_faculty = out["department"].astype(str) == faculty
+    for code, section, source, target in moves[["code", "section", "from", "to"]].itertuples(index=False, name=None):
+        rows = in_faculty & (key == f"{code}\x1f{section}") & (out["instructor"] == source)
+        out.loc[rows, "instructor"] = target
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2_000, 5_000, 20_000])
+    parser.add_argument("--budget", type=float, default=5.0)
+    parser.add_argument("--max-moves", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>7} {'faculty':>8} {'instr':>6} {'moves':>6} {'seconds':>8} "
+          f"{'max h':>13} {'std h':>13} {'clashes':>11}  ok")
+    failed = False
+    for n in args.sizes:
+        df = compact_schedule(clean_schedule(make_schedule(n, seed=1)))
+        faculty = df["department"].value_counts().index[0]
+        plan = rebalance(df, faculty, args.budget, args.max_moves)
+        s = plan.summary()
+        after = apply_plan(df, faculty, plan.moves)
+        clashes = (len(find_conflicts(df, kinds=("instructor",))), len(find_conflicts(after, kinds=("instructor",))))
+        loads = after.groupby("instructor")["minutes"].sum().reindex(plan.after.index)
+        ok = clashes[1] <= clashes[0] and (loads == plan.after).all()
+        failed |= not ok
+        print(f"{n:7d} {int((df['department'] == faculty).sum()):8d} {s['instructors']:6d} {s['moves']:6d} "
+              f"{s['seconds']:8.2f} {s['max_before'] / 60:5.1f} -> {s['max_after'] / 60:4.1f} "
+              f"{s['std_before'] / 60:5.2f} -> {s['std_after'] / 60:4.2f} {clashes[0]:5d}->{clashes[1]:<5d} {ok}"
+              f"{'' if s['converged'] else '  (limit reached)'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
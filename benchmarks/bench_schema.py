@@ -0,0 +1,52 @@
+"""Report the memory footprint of the compact schema and time the dashboard groupbys on it.
+
+    python benchmarks/bench_schema.py [workbook.xlsx] [--scale K]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from academic_load.cleaning import clean_schedule, read_schedule  # noqa: E402
+from academic_load.schema import compact_schedule, memory_report  # noqa: E402
+
+GROUPBYS = {
+    "instructor minutes": lambda d: d.groupby("instructor", observed=True)["minutes"].sum(),
+    "hall minutes": lambda d: d.groupby("hall", observed=True)["minutes"].sum(),
+    "days x hour_slot": lambda d: d.groupby(["days", d["start_hour"] // 1], observed=True).size(),
+}
+
+
+def best_of(fn, df, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("workbook", nargs="?", default="cleaned_schedule.xlsx")
+    parser.add_argument("--scale", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    raw = pd.concat([read_schedule(args.workbook)] * args.scale, ignore_index=True)
+    wide = clean_schedule(raw)
+    compact = compact_schedule(wide)
+
+    print(f"rows={len(wide)}")
+    print(memory_report(wide, compact).to_string())
+    print()
+    for name, fn in GROUPBYS.items():
+        t_wide, t_compact = best_of(fn, wide), best_of(fn, compact)
+        print(f"{name:20s} object {t_wide * 1000:7.2f} ms  codes {t_compact * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Check that dashboard memory stays flat as concurrent sessions are added.
+
+    python benchmarks/bench_sessions.py [--sessions 50] [--rows 200000] [--max-ratio 0.05]
+
+Builds a synthetic archive in a temporary directory, points the dashboard at
+it (SCHEDULE_ARCHIVE, with its cache and alias map in the same directory)
+and opens ``--sessions`` independent sessions with Streamlit's AppTest. Each
+session runs once, re-runs with a narrower hour range, and is kept alive
+with its session state. AppTest also keeps the rendered page of every
+session, which in production lives in the browser, so that is dropped after
+the second run. Live memory (tracemalloc, after a full collection) and
+resident memory (VmRSS) are sampled after the first two sessions, which pay
+for loading the shared dataset, its indexes and Streamlit's own per-app
+caches, and after every tenth one; growth is measured from the second. The
+cleaned table is held once per process in ``st.cache_resource`` as
+read-only buffers and sessions only keep row positions and cached results,
+so the live growth per extra session should be a small fraction of the
+dataset's size. RSS is shown for reference; it also moves with allocator
+fragmentation. The script exits non-zero when the average live growth per
+session exceeds ``--max-ratio`` times the dataset's in-memory size.
+Linux only (reads /proc/self/status).
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from academic_load.archive import ARCHIVE_ENV, ingest, read_store  # noqa: E402
+from synthetic import make_schedule  # noqa: E402
+
+
+def rss_bytes():
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("VmRSS not available")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--max-ratio", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory(prefix="bench-sessions-") as tmp:
+        source = os.path.join(tmp, "schedule.csv")
+        make_schedule(args.rows, seed=3).to_csv(source, index=False)
+        store = os.path.join(tmp, "store")
+        ingest([source], store, log=lambda msg: None)
+        dataset = read_store(store).memory_usage(deep=True).sum()
+        # The Arrow cache and the alias map the app reads stay in tmp.
+        os.environ[ARCHIVE_ENV] = store
+        os.environ["SCHEDULE_CACHE_DIR"] = os.path.join(tmp, "cache")
+        os.environ["SCHEDULE_ALIASES"] = os.path.join(tmp, "name_aliases.json")
+        os.chdir(tmp)
+
+        gc.collect()
+        base = rss_bytes()
+        tracemalloc.start()
+        sessions, samples = [], []
+        t0 = time.perf_counter()
+        for i in range(args.sessions):
+            at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=600).run()
+            at.sidebar.slider[0].set_value((10.0, 16.0)).run()
+            if at.exception:
+                raise SystemExit(f"session {i + 1} failed: {at.exception[0].message}")
+            at._tree = None  # the rendered page; see the module docstring
+            sessions.append(at)
+            gc.collect()
+            if i < 2 or (i + 1) % 10 == 0:
+                samples.append((i + 1, tracemalloc.get_traced_memory()[0], rss_bytes()))
+        seconds = time.perf_counter() - t0
+        tracemalloc.stop()
+
+        mb = 2 ** 20
+        print(f"dataset: {args.rows} rows, {dataset / mb:.1f} MB in memory; RSS before sessions {base / mb:.0f} MB")
+        print(f"{args.sessions} sessions x 2 runs in {seconds:.1f}s")
+        for n, live, rss in samples:
+            print(f"  sessions={n:3d}  live {live / mb:7.1f} MB  RSS {rss / mb:7.1f} MB")
+        first, last = samples[1][1], samples[-1][1]
+        per_session = (last - first) / max(args.sessions - 2, 1)
+        ratio = per_session / dataset
+        print(f"growth per extra session: {per_session / mb:.2f} MB ({ratio:.1%} of the dataset)")
+        if ratio > args.max_ratio:
+            print(f"FAIL: above {args.max_ratio:.0%} of the dataset per session")
+            return 1
+        print("OK")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
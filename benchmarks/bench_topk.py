@@ -0,0 +1,96 @@
+"""Compare top-K selection with the full sort it replaces.
+
+    python benchmarks/bench_topk.py [--labels 10000 1000000] [--k 10 200] [--rows 1000000]
+
+For rollups of ``--labels`` distinct labels (few distinct totals, so ties
+are common) the script times ``sort_values(ascending=False).head(k)`` and
+``top_series`` for every ``k`` and checks that ``top_series`` returns what a
+stable sort would. It then times the sunburst's per-faculty top 3 as the
+old filter-and-sort loop and as one ``top_per_group`` pass, and ``compute``
+on a ``--rows`` synthetic schedule with each ``k``.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from academic_load.analytics import compute  # noqa: E402
+from academic_load.cleaning import clean_schedule  # noqa: E402
+from academic_load.filter_index import FilterIndex, make_spec  # noqa: E402
+from academic_load.schema import compact_schedule  # noqa: E402
+from academic_load.topk import top_per_group, top_series  # noqa: E402
+from synthetic import make_schedule  # noqa: E402
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def rollup_like(n, rng):
+    labels = pd.Index([f"label {i:07d}" for i in range(n)], name="instructor")
+    return pd.Series(rng.integers(1, 200, n) * 50, index=labels, name="minutes")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 200])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    ok = True
+
+    print(f"{'labels':>9} {'k':>5} {'sort+head ms':>13} {'top-K ms':>9} {'same':>5}")
+    for n in args.labels:
+        series = rollup_like(n, rng)
+        for k in args.k:
+            _, t_sort = best_of(lambda: series.rename("minutes").reset_index()
+                                .sort_values("minutes", ascending=False).head(k))
+            top, t_top = best_of(lambda: top_series(series, k))
+            expected = series.sort_values(ascending=False, kind="stable").head(k).reset_index()
+            same = top.equals(expected)
+            ok &= same
+            print(f"{n:9d} {k:5d} {t_sort * 1000:13.2f} {t_top * 1000:9.2f} {str(same):>5}")
+
+    n_dept, per_dept = 50, 2_000
+    sb = pd.DataFrame({
+        "department": np.repeat([f"Faculty {d:02d}" for d in range(n_dept)], per_dept),
+        "instructor": [f"Instructor {i}" for i in range(n_dept * per_dept)],
+        "minutes": rng.integers(1, 100, n_dept * per_dept) * 50,
+    })
+    depts = [f"Faculty {d:02d}" for d in rng.permutation(n_dept)]
+    loop, t_loop = best_of(lambda: pd.concat(
+        [sb[sb["department"] == d].sort_values("minutes", ascending=False, kind="stable").head(3) for d in depts],
+        ignore_index=True))
+    rank = pd.Index(depts).get_indexer(sb["department"])
+    grouped, t_grouped = best_of(lambda: sb.iloc[top_per_group(rank, sb["minutes"].to_numpy(), 3)]
+                                 .reset_index(drop=True))
+    same = grouped.equals(loop)
+    ok &= same
+    print(f"per-faculty top 3 ({n_dept} faculties, {len(sb)} rows): loop {t_loop * 1000:.1f} ms, "
+          f"grouped {t_grouped * 1000:.1f} ms, same {same}")
+
+    df = compact_schedule(clean_schedule(make_schedule(args.rows, seed=args.seed)))
+    index = FilterIndex(df)
+    spec = make_spec()
+    for k in args.k:
+        _, seconds = best_of(lambda: compute(df, index, spec, k), repeat=3)
+        print(f"compute on {args.rows} rows ({len(df)} cleaned), top {k}: {seconds * 1000:.1f} ms")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
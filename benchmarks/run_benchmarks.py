@@ -0,0 +1,195 @@
+"""Time and memory-profile every stage of the dashboard on synthetic schedules.
+
+    python benchmarks/run_benchmarks.py [--sizes 1000 100000 1000000] [--out FILE]
+                                        [--compare OLD.json] [--threshold 1.25]
+
+Each stage is timed (best of ``--repeat`` runs) and run once more under
+tracemalloc for its peak Python/NumPy allocation (Arrow's own buffers are
+not traced). Results go to a JSON file; ``--compare``
+prints the ratio against an earlier file and exits non-zero when any stage
+got slower than ``--threshold``. The workbook parse is only measured up to
+``--excel-max`` rows because writing a larger .xlsx takes minutes.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from academic_load import cache  # noqa: E402
+from academic_load.analytics import compute, panel_rows, rollup  # noqa: E402
+from academic_load.cleaning import clean_schedule, read_schedule  # noqa: E402
+from academic_load.conflicts import find_conflicts  # noqa: E402
+from academic_load.export import export_bytes  # noqa: E402
+from academic_load.filter_index import FilterIndex, make_spec  # noqa: E402
+from academic_load.occupancy import HallOccupancy  # noqa: E402
+from academic_load.schema import compact_schedule  # noqa: E402
+from synthetic import make_schedule  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+FULL_DAY = (8.3, 21.45)
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / 2 ** 20}
+
+
+def typical_specs(df):
+    """A handful of selections like the ones people click in the sidebar."""
+    def top(col, k):
+        return [str(v) for v in df[col].value_counts().index[:k] if str(v) not in ("Unknown", "Other")]
+    return [
+        make_spec(hour_range=FULL_DAY),
+        make_spec(faculties=top("department", 1), hour_range=FULL_DAY),
+        make_spec(days=["Tue", "Thu"], hour_range=(10.0, 14.0)),
+        make_spec(instructors=top("instructor", 3), hour_range=FULL_DAY),
+        make_spec(halls=top("hall", 2), days=["Mon"], hour_range=FULL_DAY),
+    ]
+
+
+def panel_rollups(cells):
+    return {
+        "instructor_minutes": lambda: rollup(cells, "instructor"),
+        "hall_minutes": lambda: rollup(cells, "hall"),
+        "department_minutes": lambda: rollup(cells, "department"),
+        "peak_slots": lambda: rollup(cells, ["days", "hour_slot"], "sessions"),
+        "heatmap": lambda: rollup(cells, ["days", "hour_bin"], "sessions"),
+        "sunburst": lambda: rollup(cells, ["department", "instructor"]),
+        "course_sessions": lambda: rollup(cells, "course_title", "sessions"),
+        "course_minutes": lambda: rollup(cells, "course_title"),
+    }
+
+
+def bench_size(n, repeat, excel_max, seed):
+    raw = make_schedule(n, seed)
+    stages = {}
+
+    if n <= excel_max:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "schedule.xlsx")
+            raw.to_excel(path, index=False)
+            stages["read_excel"] = measure(lambda: read_schedule(path), 1)
+            stages["load_and_clean_cold"] = measure(
+                lambda: cache.load_and_clean(path, cache_dir=tempfile.mkdtemp(dir=tmp)), 1)
+            warm_dir = os.path.join(tmp, "warm")
+            cache.load_and_clean(path, cache_dir=warm_dir)
+            stages["load_and_clean_warm"] = measure(lambda: cache.load_and_clean(path, cache_dir=warm_dir), repeat)
+
+    stages["clean"] = measure(lambda: compact_schedule(clean_schedule(raw)), 1)
+    df = compact_schedule(clean_schedule(raw))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arrow = os.path.join(tmp, "schedule.arrow")
+        stages["cache_write"] = measure(lambda: cache.write_atomic(df, arrow), 1)
+        stages["cache_read"] = measure(lambda: cache.read_mapped(arrow), repeat)
+
+    specs = typical_specs(df)
+    stages["filter_index_build"] = measure(lambda: FilterIndex(df), 1)
+    index = FilterIndex(df)
+    stages["filter_select"] = measure(lambda: [index.select(s) for s in specs], repeat)
+    stages["filter_select"]["seconds"] /= len(specs)
+
+    stages["compute"] = measure(lambda: [compute(df, index, s) for s in specs], repeat)
+    stages["compute"]["seconds"] /= len(specs)
+    for name, fn in panel_rollups(panel_rows(df, index.select(specs[1]))).items():
+        stages[f"panel_{name}"] = measure(fn, repeat)
+
+    stages["conflicts"] = measure(lambda: find_conflicts(df), 1)
+    stages["occupancy_build"] = measure(lambda: HallOccupancy(df), 1)
+    stages["export_csv"] = measure(lambda: export_bytes("CSV", df=df), 1)
+
+    return {"rows_raw": len(raw), "rows_clean": len(df), "stages": stages}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=HERE).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(old, new, threshold):
+    regressions = 0
+    for size, run in new["results"].items():
+        before = old.get("results", {}).get(size)
+        if not before:
+            continue
+        for stage, now in run["stages"].items():
+            then = before["stages"].get(stage)
+            if not then or then["seconds"] <= 0:
+                continue
+            ratio = now["seconds"] / then["seconds"]
+            flag = "  REGRESSION" if ratio > threshold else ""
+            regressions += bool(flag)
+            print(f"{size:>9} {stage:28s} {then['seconds'] * 1000:10.2f} -> {now['seconds'] * 1000:10.2f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--excel-max", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=os.path.join(HERE, "results", "latest.json"))
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(), "results": {}}
+    for n in args.sizes:
+        t0 = time.perf_counter()
+        run = bench_size(n, args.repeat, args.excel_max, args.seed)
+        report["results"][str(n)] = run
+        print(f"== {n} rows ({run['rows_clean']} cleaned) in {time.perf_counter() - t0:.1f}s")
+        for stage, m in run["stages"].items():
+            print(f"   {stage:28s} {m['seconds'] * 1000:10.2f} ms  peak {m['peak_mb']:8.1f} MB")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            old = json.load(fh)
+        if compare(old, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
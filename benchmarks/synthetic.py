@@ -0,0 +1,104 @@
+"""Synthetic schedules shaped like cleaned_schedule.xlsx, for benchmarks.
+
+``make_schedule(n)`` returns a raw frame with the workbook's columns:
+course codes drawn from the faculty-map prefixes (plus a few unmapped ones),
+Zipf-skewed instructor and hall popularity, the workbook's mix of day labels
+including the ones cleaning drops, realistic class-time slots with their
+minutes, and the usual share of 00:00-00:00 internship rows.
+"""
+import numpy as np
+import pandas as pd
+
+from academic_load.cleaning import FACULTY_MAP
+
+# (class_times, weight); 00:00-00:00 are the unscheduled internship rows.
+TIME_SLOTS = [
+    ("08:30-09:45", 118), ("10:00-11:15", 102), ("10:00-10:50", 87), ("11:00-11:50", 92),
+    ("11:30-12:45", 79), ("12:00-12:50", 93), ("13:00-14:15", 150), ("14:30-15:45", 161),
+    ("16:00-17:15", 158), ("17:30-18:45", 71), ("19:00-20:15", 57), ("20:30-21:45", 40),
+    ("09:00-18:00", 12), ("00:00-00:00", 159),
+]
+DAY_LABELS = [("Mon", 332), ("Tue", 300), ("Wed", 312), ("Thu", 287), ("Fri", 218), ("St", 104), ("S", 4), ("n", 4)]
+EXTRA_PREFIXES = ["XYZ", "ART", "MUS"]
+MAIN_TERM = ("20.08.2025-10.12.2025", "2025-08-20", "2025-12-10")
+SHORT_TERMS = [
+    ("16.08.2025-14.09.2025", "2025-08-16", "2025-09-14"),
+    ("08.09.2025-24.10.2025", "2025-09-08", "2025-10-24"),
+]
+
+
+def _weights(values):
+    w = np.array([v for _, v in values], dtype=float)
+    return w / w.sum()
+
+
+def _zipf_choice(rng, n_values, size, a=1.1):
+    ranks = np.arange(1, n_values + 1, dtype=float)
+    p = ranks ** -a
+    return rng.choice(n_values, size=size, p=p / p.sum())
+
+
+def make_schedule(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(n_rows)
+
+    prefixes = np.array(list(FACULTY_MAP) + EXTRA_PREFIXES)
+    n_courses = max(10, n // 4)
+    course_prefix = prefixes[_zipf_choice(rng, len(prefixes), n_courses, a=0.8)]
+    course_codes = np.char.add(course_prefix, (1000 + np.arange(n_courses)).astype(str))
+    course_titles = np.char.add("Course ", np.arange(n_courses).astype(str))
+    course = _zipf_choice(rng, n_courses, n, a=0.6)
+
+    n_instructors = max(5, n // 7)
+    instructor_names = np.char.add("Instructor ", np.arange(n_instructors).astype(str))
+    instructor_names = np.char.add(instructor_names, ", Ph.D.")
+    # Roughly the workbook's sessions-per-hall and sessions-per-instructor ratios.
+    n_halls = max(10, n // 22)
+    hall_names = np.char.add(np.char.add("#", (100 + np.arange(n_halls)).astype(str)), "/Valikhanov bld.")
+
+    slot_labels = np.array([s for s, _ in TIME_SLOTS])
+    slot = rng.choice(len(TIME_SLOTS), size=n, p=_weights(TIME_SLOTS))
+    times = slot_labels[slot]
+    start = np.char.add(np.array([s[:5] for s in slot_labels])[slot], ":00")
+    end = np.char.add(np.array([s[6:] for s in slot_labels])[slot], ":00")
+    slot_minutes = np.array([
+        (int(s[6:8]) * 60 + int(s[9:11])) - (int(s[:2]) * 60 + int(s[3:5])) for s in slot_labels
+    ])
+
+    day_labels = np.array([d for d, _ in DAY_LABELS])
+    days = day_labels[rng.choice(len(DAY_LABELS), size=n, p=_weights(DAY_LABELS))]
+
+    halls = hall_names[_zipf_choice(rng, n_halls, n, a=0.2)].astype(object)
+    unscheduled = slot_labels[slot] == "00:00-00:00"
+    halls[unscheduled] = np.nan
+
+    term = rng.random(n) < 0.99
+    short = rng.integers(0, len(SHORT_TERMS), n)
+    class_dates = np.where(term, MAIN_TERM[0], np.array([t[0] for t in SHORT_TERMS])[short])
+    start_date = np.where(term, MAIN_TERM[1], np.array([t[1] for t in SHORT_TERMS])[short])
+    end_date = np.where(term, MAIN_TERM[2], np.array([t[2] for t in SHORT_TERMS])[short])
+
+    section = rng.integers(1, 12, n).astype(object)
+    lettered = rng.random(n) < 0.03
+    section[lettered] = np.char.add(section[lettered].astype(str), "A")
+    cred = rng.choice([3, 2, 0, 1, 6], size=n, p=[0.78, 0.1, 0.05, 0.04, 0.03]).astype(object)
+
+    return pd.DataFrame({
+        "code": course_codes[course],
+        "course_title": course_titles[course],
+        "l/t": "L",
+        "section": section,
+        "class_dates": class_dates,
+        "class_times": times,
+        "days": days,
+        "hall": halls,
+        "instructor": instructor_names[_zipf_choice(rng, n_instructors, n, a=0.2)],
+        "cred": cred,
+        "limit": rng.integers(5, 60, n),
+        "minutes": slot_minutes[slot],
+        "start_date": pd.to_datetime(start_date),
+        "end_date": pd.to_datetime(end_date),
+        "start_time": start,
+        "end_time": end,
+        "department": course_prefix[course],
+    })
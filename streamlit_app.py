@@ -1,10 +1,32 @@
+import functools
+import os
+from datetime import time, timedelta
+from uuid import uuid4
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 
+from academic_load.archive import ARCHIVE_ENV, list_terms, read_store, store_version
+from academic_load.export import EXPORT_FORMATS, export_bytes
+from academic_load.filter_index import HOUR_RANGE, HOUR_STEP, make_spec
+from academic_load.incremental import ScheduleState, ScheduleStore
+from academic_load.instrument import Profiler
+from academic_load.names import aliases_path, dedupe_names
+from academic_load.rebalance import rebalance
+from academic_load.topk import top_series
+
 st.set_page_config(page_title="KIMEP Academic Load Intelligence", layout="wide")
 
+prof = Profiler.from_env()
+
+# The conflicts table on the page is capped; the CSV download has every pair.
+CONFLICT_ROWS_SHOWN = 1000
+
+# Sizes offered for the ranking panels and the top-N export.
+TOP_N_OPTIONS = [5, 10, 20, 50, 100, 200]
+
 NEON_CSS = """
 <style>
 header[data-testid="stHeader"] {
@@ -105,135 +127,107 @@ st.markdown(NEON_CSS, unsafe_allow_html=True)
 
 st.markdown(
     '<div class="header-box"><div class="big-title">🚀 KIMEP Academic Load Intelligence</div>'
-    '<div class="subtitle">Academic Efficiency - top 10 focused </div></div>',
+    '<div class="subtitle">Academic Efficiency - top-N focused </div></div>',
     unsafe_allow_html=True
 )
 
-@st.cache_data
-def load_and_clean(path="cleaned_schedule.xlsx"):
-    try:
-        df = pd.read_excel(path)
-    except Exception:
-        return None
-    
-    df.columns = df.columns.astype(str).str.strip().str.replace(r"\s+", "_", regex=True).str.lower()
-    
-    expected = {
-        "course_title": "", "code": "", "class_dates": "", "class_times": "",
-        "days": "", "hall": "", "instructor": "", "minutes": 0,
-        "start_time": "", "end_time": "", "department": ""
-    }
-    for k, v in expected.items():
-        if k not in df.columns:
-            df[k] = v
-    
-    df["minutes"] = pd.to_numeric(df["minutes"], errors="coerce").fillna(0).astype(int)
-    
-    valid_days = {"Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"}
-    def normalize_day(raw):
-        if pd.isna(raw):
-            return np.nan
-        s = str(raw).strip()
-        s_cap = s.capitalize()
-        mapping = {"M": "Mon", "T": "Tue", "W": "Wed", "R": "Thu", "F": "Fri", "S": "Sat", "Su": "Sun"}
-        if s_cap in valid_days:
-            return s_cap
-        if s in mapping:
-            return mapping[s]
-        return np.nan
-    
-    df["days_clean"] = df["days"].apply(normalize_day)
-    df = df[~df["days_clean"].isna()].copy()
-    df["days"] = df["days_clean"]
-    df.drop(columns=["days_clean"], inplace=True)
-    
-    def parse_hour(x):
-        try:
-            t = pd.to_datetime(str(x), errors="coerce")
-            if pd.isna(t):
-                return np.nan
-            return t.hour + t.minute / 60.0
-        except:
-            return np.nan
-    
-    df["start_hour"] = df["start_time"].apply(parse_hour)
-    
-    df["instructor"] = df["instructor"].astype(str).replace({"nan": ""}).str.strip().replace({"": "Unknown"})
-    df["hall"] = df["hall"].astype(str).replace({"nan": ""}).str.strip().replace({"": "Unknown"})
-    df["course_title"] = df["course_title"].astype(str).replace({"nan": ""}).str.strip().replace({"": "Unknown"})
-    
-    def extract_faculty(code_str):
-        if pd.isna(code_str) or str(code_str).strip() == "":
-            return "Unknown"
-        
-        code = str(code_str).strip()
-        import re
-        match = re.match(r'^([A-Z]+)', code)
-        if not match:
-            return "Unknown"
-        
-        prefix = match.group(1)
-        
-        faculty_map = {
-            "ACC": "Bang College of Business",
-            "BUS": "Bang College of Business",
-            "FIN": "Bang College of Business",
-            "MGT": "Bang College of Business",
-            "MKT": "Bang College of Business",
-            "OPM": "Bang College of Business",
-            "IFS": "Bang College of Business",
-            "EBA": "Bang College of Business",
-            "MM": "Bang College of Business",
-            "ECN": "College of Social Sciences",
-            "IRL": "College of Social Sciences",
-            "POL": "College of Social Sciences",
-            "PAD": "College of Social Sciences",
-            "PAF": "College of Social Sciences",
-            "SOC": "College of Social Sciences",
-            "CSS": "College of Social Sciences",
-            "GEN": "College of Social Sciences",
-            "JMC": "College of Human Sciences & Education",
-            "PSY": "College of Human Sciences & Education",
-            "EPM": "College of Human Sciences & Education",
-            "TFL": "College of Human Sciences & Education",
-            "TRN": "College of Human Sciences & Education",
-            "LING": "College of Human Sciences & Education",
-            "COGN": "College of Human Sciences & Education",
-            "ENG": "College of Human Sciences & Education",
-            "KAZ": "College of Human Sciences & Education",
-            "RUS": "College of Human Sciences & Education",
-            "CHN": "College of Human Sciences & Education",
-            "GER": "College of Human Sciences & Education",
-            "KOR": "College of Human Sciences & Education",
-            "LDP": "College of Human Sciences & Education",
-            "FOP": "College of Human Sciences & Education",
-            "LAW": "Law School",
-            "CIT": "School of Computer Science & Mathematics",
-            "CLP": "School of Computer Science & Mathematics",
-            "SCS": "School of Computer Science & Mathematics",
-            "MATH": "School of Computer Science & Mathematics",
-        }
-        
-        return faculty_map.get(prefix, "Other")
-    
-    df["department"] = df["code"].apply(extract_faculty)
-    
-    return df
-
-df = load_and_clean()
-if df is None:
-    st.warning("Please upload cleaned_schedule.xlsx")
-    uploaded = st.file_uploader("Upload cleaned_schedule.xlsx", type=["xlsx","xls"])
-    if not uploaded:
-        st.stop()
-    df = load_and_clean(uploaded)
+@st.cache_resource
+def schedule_store(path="cleaned_schedule.xlsx"):
+    return ScheduleStore(path)
+
+@st.cache_resource(max_entries=4, show_spinner="Loading terms…")
+def archive_state(store_dir, terms, version):
+    df, review = dedupe_names(read_store(store_dir, terms), aliases_path(store_dir))
+    return ScheduleState(df, version, {"name_review": review})
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def filtered_conflicts(_state, source, version, spec, filtered):
+    conflicts = _state.conflicts
+    if filtered:
+        rows = _state.index.select(spec)
+        conflicts = conflicts[np.isin(conflicts["row_a"], rows) | np.isin(conflicts["row_b"], rows)]
+    return conflicts
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def conflicts_csv(_state, source, version, spec, filtered):
+    conflicts = filtered_conflicts(_state, source, version, spec, filtered)
+    table = _state.conflict_table.loc[conflicts.index]
+    return table.to_csv(index=False).encode("utf-8")
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def dated_minutes(_state, source, version, spec):
+    """Teaching minutes per calendar week and in total for the rows matching ``spec``."""
+    rows = _state.index.select(spec)
+    start, end = spec.dates or (None, None)
+    calendar = _state.calendar
+    return calendar.weekly_minutes(rows, start, end), calendar.term_minutes(rows, start, end)
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def instructor_week_hours(_state, source, version, spec):
+    """Dated hours per teaching week of every instructor with sessions matching ``spec``."""
+    rows = _state.index.select(spec)
+    start, end = spec.dates or (None, None)
+    column = _state.df["instructor"]
+    minutes, weeks = _state.calendar.group_weeks(column.cat.codes.to_numpy(), rows, start, end)
+    active = weeks > 0
+    return pd.Series(minutes[active] / 60 / weeks[active],
+                     index=column.cat.categories[:len(active)][active], name="hours")
+
+@st.cache_resource(max_entries=8, show_spinner="Searching for a better balance…")
+def rebalance_plan(_state, source, version, faculty, time_budget, max_moves):
+    return rebalance(_state.df, faculty, time_budget, max_moves)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def hall_utilization(_state, source, version, top_n):
+    occ = _state.occupancy
+    return top_series(occ.utilization_by_hall(), top_n), occ.utilization_by_time()
+
+@st.cache_data(max_entries=32, show_spinner="Preparing export…")
+def export_filtered(_state, source, version, spec, fmt, top_n):
+    state = _state
+    if fmt == "Excel (top-N tables)":
+        return export_bytes(fmt, res=state.engine.query(spec, top_n))
+    data = state.df
+    rows = state.index.select(spec)
+    if 0 < len(rows) < len(data):
+        data = data.iloc[rows]
+    return export_bytes(fmt, df=data)
+
+source = "cleaned_schedule.xlsx"
+archive_dir = os.environ.get(ARCHIVE_ENV)
+all_terms = list(list_terms(archive_dir)) if archive_dir else []
+with prof.stage("load") as rec:
+    delta = None
+    if all_terms:
+        terms = st.sidebar.multiselect("📚 Terms", all_terms, default=all_terms)
+        if not terms:
+            st.info("Select at least one term.")
+            st.stop()
+        source = (archive_dir, tuple(terms))
+        state = archive_state(archive_dir, tuple(terms), store_version(archive_dir))
+    else:
+        store = schedule_store(source)
+        delta = store.refresh()
+        if store.state.df is None:
+            st.warning("Please upload cleaned_schedule.xlsx")
+            uploaded = st.file_uploader("Upload cleaned_schedule.xlsx", type=["xlsx","xls"])
+            if not uploaded:
+                st.stop()
+            source = uploaded
+            store = schedule_store(source)
+        state = store.state
+    df = state.df
+    rec["rows_out"] = len(df)
+    if delta is not None:
+        rec["rows_in"] = len(delta.added) + len(delta.removed)
+        st.toast(f"Schedule updated: {len(delta.added)} sessions added, {len(delta.removed)} removed")
 
 st.sidebar.markdown("### 🔎 Filters (leave empty to show all)")
 
 days_options = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-instructors = sorted(df["instructor"].replace("Unknown", np.nan).dropna().unique().tolist())
-faculties = sorted(df["department"].replace("Unknown", np.nan).replace("Other", np.nan).dropna().unique().tolist())
-halls = sorted(df["hall"].replace("Unknown", np.nan).dropna().unique().tolist())
+instructors = [v for v in state.labels("instructor") if v != "Unknown"]
+faculties = [v for v in state.labels("department") if v not in ("Unknown", "Other")]
+halls = [v for v in state.labels("hall") if v != "Unknown"]
 
 st.sidebar.markdown("👤 **Instructor**")
 inst_sel = st.sidebar.multiselect("Select instructors", options=instructors, default=[], label_visibility="collapsed")
@@ -248,26 +242,43 @@ st.sidebar.markdown("📅 **Days**")
 days_sel = st.sidebar.multiselect("Select days", options=days_options, default=[], label_visibility="collapsed")
 
 st.sidebar.markdown("⏰ **Hour range (08:30–21:45)**")
-time_range = st.sidebar.slider("Time range", 8.3, 21.45, (8.3, 21.45), step=0.25, label_visibility="collapsed")
-
-top_n = 10
-
-df_f = df.copy()
-if inst_sel:
-    df_f = df_f[df_f["instructor"].isin(inst_sel)]
-if dept_sel:
-    df_f = df_f[df_f["department"].isin(dept_sel)]
-if hall_sel:
-    df_f = df_f[df_f["hall"].isin(hall_sel)]
-if days_sel:
-    df_f = df_f[df_f["days"].isin(days_sel)]
-
-mask_time = df_f["start_hour"].notna() & (df_f["start_hour"] >= time_range[0]) & (df_f["start_hour"] <= time_range[1])
-df_f = pd.concat([df_f[mask_time], df_f[df_f["start_hour"].isna()]]).drop_duplicates()
-
-if df_f.empty:
+time_range = st.sidebar.slider("Time range", *HOUR_RANGE, HOUR_RANGE, step=HOUR_STEP, label_visibility="collapsed")
+
+date_span = state.calendar.span()
+date_sel = None
+if date_span is not None:
+    first_day, last_day = (pd.Timestamp(d).date() for d in date_span)
+    st.sidebar.markdown("🗓️ **Dates**")
+    picked = st.sidebar.date_input("Dates", (first_day, last_day), min_value=first_day, max_value=last_day,
+                                   label_visibility="collapsed")
+    if len(picked) == 2 and tuple(picked) != (first_day, last_day):
+        date_sel = picked
+
+merged = state.name_review
+if merged is not None and len(merged):
+    with st.sidebar.expander(f"🔗 Merged name variants ({len(merged)})"):
+        st.dataframe(merged[["name", "canonical", "rule", "score"]], use_container_width=True, hide_index=True)
+        st.caption("Merges are not saved until confirmed: export them with `python -m academic_load.names "
+                   "--out review.csv`, mark each `decision` as merge or distinct, then run `--apply review.csv`.")
+
+st.sidebar.markdown("🏆 **Top N in rankings**")
+top_n = st.sidebar.select_slider("Top N", options=TOP_N_OPTIONS, value=10, label_visibility="collapsed")
+
+spec = make_spec(inst_sel, dept_sel, hall_sel, days_sel, time_range, date_sel)
+with prof.stage("filter", rows_in=len(df)) as rec:
+    rows = state.index.select(spec)
+    rec["rows_out"] = len(rows)
+
+with prof.stage("kpis") as rec:
+    engine = state.engine
+    res = engine.query(spec, top_n)
+    cov = engine.backend.coverage()
+    rec["rows_in"] = len(engine.backend)
+    rec["rows_out"] = res.sessions
+
+filtered = res.matched and len(rows) < len(df)
+if not res.matched:
     st.warning("No rows matched filters — showing full cleaned dataset.")
-    df_f = df.copy()
 
 def style_figure(fig):
     fig.update_layout(
@@ -280,37 +291,135 @@ def style_figure(fig):
     fig.update_yaxes(showgrid=True, gridcolor="lightgray", showline=True, linecolor="lightgray")
     return fig
 
+CH_H = 320
+
+def bars_height(n):
+    # Horizontal bar charts grow with the Top N setting so labels stay apart.
+    return max(CH_H, 18 * n + 80)
+
+NEON = ["#4cc9f0", "#7209b7", "#4895ef", "#560bad", "#b5179e", "#f72585", "#3f37c9"]
+
+# One cached, styled figure per distinct aggregate: a rerun whose panel data
+# did not change reuses the figure instead of going through px.* again.
+# The figures are shared between sessions and must not be modified.
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def instructor_load_figure(inst_load):
+    fig = px.scatter(inst_load, x="instructor", y="minutes", size="minutes", color="minutes",
+                    color_continuous_scale=[NEON[0], NEON[1]],
+                    labels={"minutes":"Minutes","instructor":"Instructor"}, height=CH_H)
+    fig.update_traces(marker=dict(line=dict(width=0.4, color="rgba(0,0,0,0.1)")))
+    fig = style_figure(fig)
+    fig.update_xaxes(tickangle=-35, tickfont=dict(size=10))
+    fig.update_yaxes(title_text="Total minutes")
+    return fig
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def hall_usage_figure(hall_usage):
+    fig = px.bar(hall_usage, x="minutes", y="hall", orientation="h", color="minutes",
+                color_continuous_scale=[NEON[2], NEON[0]],
+                labels={"minutes":"Minutes","hall":"Hall"}, height=bars_height(len(hall_usage)))
+    fig.update_traces(marker_line_color="rgba(0,0,0,0.1)")
+    return style_figure(fig)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def heatmap_figure(heat):
+    fig = px.density_heatmap(heat, x="hour_bin", y="days", z="count",
+                            labels={"hour_bin":"Start hour bin","days":"Day","count":"Sessions"},
+                            color_continuous_scale="Viridis", height=CH_H)
+    fig = style_figure(fig)
+    fig.update_xaxes(tickangle=-45, tickfont=dict(size=10))
+    return fig
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def sunburst_figure(sb_final):
+    fig = px.sunburst(sb_final, path=["department","instructor_short"], values="minutes",
+                     height=CH_H, color="minutes", color_continuous_scale="Ice")
+    fig = style_figure(fig)
+    fig.update_traces(textfont=dict(size=12))
+    return fig
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def popular_courses_figure(popular):
+    fig = px.bar(popular, x="count", y="course_title", orientation="h", height=bars_height(len(popular)),
+                color_discrete_sequence=[NEON[4]])
+    return style_figure(fig)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def course_minutes_figure(course_min):
+    fig = px.bar(course_min, x="minutes", y="course_title", orientation="h", height=bars_height(len(course_min)),
+                color="minutes", color_continuous_scale=[NEON[1], NEON[0]])
+    return style_figure(fig)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def faculty_share_figure(dept):
+    fig = px.pie(dept, names="department", values="minutes", hole=0.35, height=360,
+                color_discrete_sequence=NEON)
+    return style_figure(fig)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def timeline_figure(weekly):
+    fig = px.bar(weekly, x="week", y="hours", height=CH_H, color_discrete_sequence=[NEON[6]],
+                labels={"week":"Week of","hours":"Teaching hours"})
+    return style_figure(fig)
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_distribution_figure(loads):
+    fig = px.box(loads, x="plan", y="hours", points="all", hover_name="instructor", height=CH_H,
+                color="plan", color_discrete_sequence=[NEON[5], NEON[0]],
+                labels={"plan":"","hours":"Hours per week"})
+    fig = style_figure(fig)
+    fig.update_layout(showlegend=False)
+    return fig
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def hall_utilization_figure(hall_util):
+    fig = px.bar(hall_util, x="utilization_pct", y="hall", orientation="h", color="utilization_pct",
+                color_continuous_scale=[NEON[2], NEON[5]],
+                labels={"utilization_pct":"Utilization %","hall":"Hall"}, height=bars_height(len(hall_util)))
+    return style_figure(fig)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def time_utilization_figure(time_util):
+    fig = px.area(time_util, x="time", y="utilization_pct", height=CH_H,
+                 labels={"utilization_pct":"Halls in use %","time":"Time"},
+                 color_discrete_sequence=[NEON[0]])
+    fig = style_figure(fig)
+    fig.update_xaxes(tickangle=-45, tickfont=dict(size=10), nticks=14)
+    return fig
+
 k1, k2, k3, k4 = st.columns(4)
-k1.markdown(f'<div class="kpi"><b>Sessions</b><br>{len(df_f)}</div>', unsafe_allow_html=True)
-k2.markdown(f'<div class="kpi"><b>Unique Courses</b><br>{df_f["course_title"].nunique()}</div>', unsafe_allow_html=True)
-k3.markdown(f'<div class="kpi"><b>Active Instructors</b><br>{df_f["instructor"].nunique()}</div>', unsafe_allow_html=True)
-k4.markdown(f'<div class="kpi"><b>Total Hours</b><br>{df_f["minutes"].sum()/60:.1f} h</div>', unsafe_allow_html=True)
+k1.markdown(f'<div class="kpi"><b>Sessions</b><br>{res.sessions}</div>', unsafe_allow_html=True)
+k2.markdown(f'<div class="kpi"><b>Unique Courses</b><br>{res.unique_courses}</div>', unsafe_allow_html=True)
+k3.markdown(f'<div class="kpi"><b>Active Instructors</b><br>{res.active_instructors}</div>', unsafe_allow_html=True)
+k4.markdown(f'<div class="kpi"><b>Total Hours</b><br>{res.total_minutes/60:.1f} h</div>', unsafe_allow_html=True)
 
 st.markdown('<div class="neon-card">', unsafe_allow_html=True)
 
-avg_minutes_per_instructor = df_f.groupby("instructor")["minutes"].sum().mean()
-top_instructor = df_f.groupby("instructor")["minutes"].sum().sort_values(ascending=False).head(1)
-top_instructor_name = top_instructor.index[0] if len(top_instructor) > 0 else "N/A"
-top_instructor_hours = top_instructor.values[0] / 60 if len(top_instructor) > 0 else 0
-percentage_above_avg = ((top_instructor_hours - avg_minutes_per_instructor/60) / (avg_minutes_per_instructor/60) * 100) if avg_minutes_per_instructor > 0 else 0
-
-if not df_f[df_f["start_hour"].notna()].empty:
-    df_peak = df_f[df_f["start_hour"].notna()].copy()
-    df_peak["hour_slot"] = (df_peak["start_hour"] // 1).astype(int)
-    peak_analysis = df_peak.groupby(["days", "hour_slot"]).size().sort_values(ascending=False).head(1)
-    if len(peak_analysis) > 0:
-        peak_day = peak_analysis.index[0][0]
-        peak_hour = int(peak_analysis.index[0][1])
-        peak_count = peak_analysis.values[0]
-        peak_text = f"{peak_day} {peak_hour:02d}:00-{peak_hour+1:02d}:00 ({peak_count} sessions)"
-    else:
-        peak_text = "N/A"
+# Hours from the dated occurrences: term length, holidays and part-term
+# sessions included. Weeks without teaching are not averaged in.
+scope = spec if res.matched else make_spec()
+
+def dated_load(**only):
+    weekly, minutes = dated_minutes(state, source, state.version, scope._replace(**only))
+    weeks = int((weekly > 0).sum())
+    return (minutes / 60 / weeks if weeks else 0.0), weeks, minutes / 60
+
+top_instructor_name = res.top_instructor
+top_instructor_hours, top_instructor_weeks, top_instructor_term = dated_load(instructors=(top_instructor_name,))
+# Same basis as the hours above: dated hours per teaching week, averaged over instructors.
+week_hours = instructor_week_hours(state, source, state.version, scope)
+avg_week_hours = week_hours.mean() if len(week_hours) else 0.0
+percentage_above_avg = (top_instructor_hours - avg_week_hours) / avg_week_hours * 100 if avg_week_hours > 0 else 0
+
+if res.peak is not None:
+    peak_day, peak_hour, peak_count = res.peak
+    peak_text = f"{peak_day} {peak_hour:02d}:00-{peak_hour+1:02d}:00 ({peak_count} sessions)"
 else:
     peak_text = "N/A"
 
-top_hall = df_f.groupby("hall")["minutes"].sum().sort_values(ascending=False).head(1)
-top_hall_name = top_hall.index[0] if len(top_hall) > 0 else "N/A"
-top_hall_hours = top_hall.values[0] / 60 if len(top_hall) > 0 else 0
+top_hall_name = res.top_hall
+top_hall_hours, top_hall_weeks, top_hall_term = dated_load(halls=(top_hall_name,))
 
 c_a, c_b, c_c = st.columns(3)
 
@@ -319,10 +428,10 @@ with c_a:
     <div style='background: rgba(76, 201, 240, 0.15); padding: 12px; border-radius: 10px; border-left: 4px solid #4cc9f0;'>
     <div style='font-size: 13px; color: #4cc9f0; font-weight: 600; margin-bottom: 4px;'>📊 DATA COVERAGE</div>
     <div style='font-size: 12px; color: #fff; line-height: 1.6;'>
-    • <b>{len(df)}</b> total sessions analyzed<br>
-    • <b>{df['department'].nunique()}</b> faculties covered<br>
-    • <b>{df['course_title'].nunique()}</b> unique courses<br>
-    • <b>{df['instructor'].nunique()}</b> instructors tracked
+    • <b>{cov['sessions']}</b> total sessions analyzed<br>
+    • <b>{cov['faculties']}</b> faculties covered<br>
+    • <b>{cov['courses']}</b> unique courses<br>
+    • <b>{cov['instructors']}</b> instructors tracked
     </div>
     </div>
     """, unsafe_allow_html=True)
@@ -333,8 +442,8 @@ with c_b:
     <div style='font-size: 13px; color: #f72585; font-weight: 600; margin-bottom: 4px;'>⚡ WORKLOAD INSIGHT</div>
     <div style='font-size: 12px; color: #fff; line-height: 1.6;'>
     • Top instructor: <b>{top_instructor_name}</b><br>
-    • Teaching load: <b>{top_instructor_hours:.1f} hours/week</b><br>
-    • <b>{percentage_above_avg:+.0f}%</b> vs. average<br>
+    • Teaching load: <b>{top_instructor_hours:.1f} hours/week</b> ({top_instructor_term:.0f} h over {top_instructor_weeks} weeks)<br>
+    • <b>{percentage_above_avg:+.0f}%</b> vs. average ({avg_week_hours:.1f} hours/week)<br>
     • Suggests workload rebalancing
     </div>
     </div>
@@ -347,7 +456,7 @@ with c_c:
     <div style='font-size: 12px; color: #fff; line-height: 1.6;'>
     • Peak time slot: <b>{peak_text}</b><br>
     • Most used hall: <b>{top_hall_name}</b><br>
-    • Hall usage: <b>{top_hall_hours:.1f} hours/week</b><br>
+    • Hall usage: <b>{top_hall_hours:.1f} hours/week</b> ({top_hall_term:.0f} h over {top_hall_weeks} weeks)<br>
     • Consider load spreading
     </div>
     </div>
@@ -357,140 +466,226 @@ st.markdown('</div>', unsafe_allow_html=True)
 
 st.markdown("---")
 
-CH_H = 320
-NEON = ["#4cc9f0", "#7209b7", "#4895ef", "#560bad", "#b5179e", "#f72585", "#3f37c9"]
-
 c1, c2 = st.columns(2)
 
-with c1:
-    st.markdown('<div class="neon-card"><div class="chart-title">🟣 Top Instructors - Load (Top 10)</div>', unsafe_allow_html=True)
-    inst_load = df_f.groupby("instructor", as_index=False)["minutes"].sum().sort_values("minutes", ascending=False).head(10)
+with c1, prof.stage("chart: instructor load") as rec:
+    st.markdown(f'<div class="neon-card"><div class="chart-title">🟣 Top Instructors - Load (Top {top_n})</div>', unsafe_allow_html=True)
+    inst_load = res.instructor_load
+    rec["rows_in"] = len(inst_load)
     if not inst_load.empty:
-        fig = px.scatter(inst_load, x="instructor", y="minutes", size="minutes", color="minutes",
-                        color_continuous_scale=[NEON[0], NEON[1]],
-                        labels={"minutes":"Minutes","instructor":"Instructor"}, height=CH_H)
-        fig.update_traces(marker=dict(line=dict(width=0.4, color="rgba(0,0,0,0.1)")))
-        fig = style_figure(fig)
-        fig.update_xaxes(tickangle=-35, tickfont=dict(size=10))
-        fig.update_yaxes(title_text="Total minutes")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(instructor_load_figure(inst_load), use_container_width=True)
     else:
         st.info("No instructor data.")
-    st.markdown('<div class="desc">• Bubble size = total teaching minutes per instructor. • Top 10 prevents overlap. Hover for exact values.</div></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="desc">• Bubble size = total teaching minutes per instructor. • Top {top_n} (sidebar) keeps labels apart. Hover for exact values.</div></div>', unsafe_allow_html=True)
 
-with c2:
-    st.markdown('<div class="neon-card"><div class="chart-title">🏛️ Hall Usage - Top Rooms (Top 10)</div>', unsafe_allow_html=True)
-    hall_usage = df_f.groupby("hall", as_index=False)["minutes"].sum().sort_values("minutes", ascending=False).head(10)
+with c2, prof.stage("chart: hall usage") as rec:
+    st.markdown(f'<div class="neon-card"><div class="chart-title">🏛️ Hall Usage - Top Rooms (Top {top_n})</div>', unsafe_allow_html=True)
+    hall_usage = res.hall_usage
+    rec["rows_in"] = len(hall_usage)
     if not hall_usage.empty:
-        fig = px.bar(hall_usage, x="minutes", y="hall", orientation="h", color="minutes",
-                    color_continuous_scale=[NEON[2], NEON[0]],
-                    labels={"minutes":"Minutes","hall":"Hall"}, height=CH_H)
-        fig.update_traces(marker_line_color="rgba(0,0,0,0.1)")
-        fig = style_figure(fig)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(hall_usage_figure(hall_usage), use_container_width=True)
     else:
         st.info("No hall data.")
     st.markdown('<div class="desc">• Horizontal bars show most used halls. Useful for allocation planning.</div></div>', unsafe_allow_html=True)
 
 c3, c4 = st.columns(2)
 
-with c3:
+with c3, prof.stage("chart: weekly heatmap") as rec:
     st.markdown('<div class="neon-card"><div class="chart-title">🔥 Weekly Intensity - Heatmap (hour bins)</div>', unsafe_allow_html=True)
-    df_h = df_f[df_f["start_hour"].notna()].copy()
-    if not df_h.empty:
-        bins = np.arange(8.5, 22.0, 1.0)
-        df_h["hour_bin"] = pd.cut(df_h["start_hour"], bins=bins, include_lowest=True).astype(str)
-        heat = df_h.groupby(["days", "hour_bin"]).size().reset_index(name="count")
-        if not heat.empty:
-            fig = px.density_heatmap(heat, x="hour_bin", y="days", z="count",
-                                    labels={"hour_bin":"Start hour bin","days":"Day","count":"Sessions"},
-                                    color_continuous_scale="Viridis", height=CH_H)
-            fig = style_figure(fig)
-            fig.update_xaxes(tickangle=-45, tickfont=dict(size=10))
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Insufficient heatmap data.")
+    heat = res.heatmap
+    rec["rows_in"] = len(heat)
+    if not heat.empty:
+        st.plotly_chart(heatmap_figure(heat), use_container_width=True)
     else:
         st.info("No parsed start_time available for heatmap.")
     st.markdown('<div class="desc">• Heatmap highlights busiest day/hour windows. Binned by hour for clarity.</div></div>', unsafe_allow_html=True)
 
-with c4:
+with c4, prof.stage("chart: faculty sunburst") as rec:
     st.markdown('<div class="neon-card"><div class="chart-title">🌞 Faculty → Instructor - Sunburst (Top 5)</div>', unsafe_allow_html=True)
-    dept_tot = df_f.groupby("department", as_index=False)["minutes"].sum().sort_values("minutes", ascending=False).head(5)
-    top_depts = dept_tot["department"].tolist()
+    sb_final = res.sunburst
+    rec["rows_in"] = len(sb_final)
     
-    sb_df = df_f[df_f["department"].isin(top_depts)].groupby(["department","instructor"], as_index=False)["minutes"].sum()
-    
-    def get_last_name(full_name):
-        if pd.isna(full_name) or str(full_name).strip() == "":
-            return "Unknown"
-        name = str(full_name).strip()
-        if "," in name:
-            return name.split(",")[0].strip()
-        else:
-            parts = name.split()
-            return parts[-1] if parts else name
-    
-    sb_df["instructor_short"] = sb_df["instructor"].apply(get_last_name)
-    
-    sb_small = []
-    for d in top_depts:
-        tmp = sb_df[sb_df["department"]==d].sort_values("minutes", ascending=False).head(3)
-        sb_small.append(tmp)
-    
-    if sb_small:
-        sb_final = pd.concat(sb_small, ignore_index=True)
-        fig = px.sunburst(sb_final, path=["department","instructor_short"], values="minutes",
-                         height=CH_H, color="minutes", color_continuous_scale="Ice")
-        fig = style_figure(fig)
-        fig.update_traces(textfont=dict(size=12))
-        st.plotly_chart(fig, use_container_width=True)
+    if not sb_final.empty:
+        st.plotly_chart(sunburst_figure(sb_final), use_container_width=True)
     else:
         st.info("Not enough data for sunburst.")
     st.markdown('<div class="desc">• Sunburst shows faculty workload across top instructors (top 5 faculties, top 3 instructors per faculty).</div></div>', unsafe_allow_html=True)
 
 c5, c6 = st.columns(2)
 
-with c5:
+with c5, prof.stage("chart: frequent courses") as rec:
     st.markdown('<div class="neon-card"><div class="chart-title">📚 Top Frequent Courses (by sessions)</div>', unsafe_allow_html=True)
-    popular = df_f["course_title"].value_counts().head(10).reset_index()
-    popular.columns = ["course_title","count"]
+    popular = res.popular_courses
+    rec["rows_in"] = len(popular)
     if not popular.empty:
-        fig = px.bar(popular, x="count", y="course_title", orientation="h", height=CH_H,
-                    color_discrete_sequence=[NEON[4]])
-        fig = style_figure(fig)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(popular_courses_figure(popular), use_container_width=True)
     else:
         st.info("No course frequency data.")
-    st.markdown('<div class="desc">• Shows most frequently scheduled courses (top 10) to avoid label crowding.</div></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="desc">• Shows the {top_n} most frequently scheduled courses.</div></div>', unsafe_allow_html=True)
 
-with c6:
+with c6, prof.stage("chart: course minutes") as rec:
     st.markdown('<div class="neon-card"><div class="chart-title">⏳ Courses by Total Minutes</div>', unsafe_allow_html=True)
-    course_min = df_f.groupby("course_title", as_index=False)["minutes"].sum().sort_values("minutes", ascending=False).head(10)
+    course_min = res.course_minutes
+    rec["rows_in"] = len(course_min)
     if not course_min.empty:
-        fig = px.bar(course_min, x="minutes", y="course_title", orientation="h", height=CH_H,
-                    color="minutes", color_continuous_scale=[NEON[1], NEON[0]])
-        fig = style_figure(fig)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(course_minutes_figure(course_min), use_container_width=True)
     else:
         st.info("No minutes-per-course data.")
-    st.markdown('<div class="desc">• Aggregated minutes per course (top 10) helps find heavy courses.</div></div>', unsafe_allow_html=True)
-
-st.markdown('<div class="neon-card"><div class="chart-title">📊 Faculty Distribution - Minutes</div>', unsafe_allow_html=True)
-dept = df_f[~df_f["department"].isin(["Other", "Unknown"])].groupby("department", as_index=False)["minutes"].sum().sort_values("minutes", ascending=False).head(10)
-if not dept.empty:
-    fig = px.pie(dept, names="department", values="minutes", hole=0.35, height=360,
-                color_discrete_sequence=NEON)
-    fig = style_figure(fig)
-    st.plotly_chart(fig, use_container_width=True)
-else:
-    st.info("No faculty data.")
-st.markdown('<div class="desc">• Faculty share limited to top 10 to keep chart readable.</div></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="desc">• Aggregated minutes per course (top {top_n}) helps find heavy courses.</div></div>', unsafe_allow_html=True)
+
+with prof.stage("chart: faculty share") as rec:
+    st.markdown('<div class="neon-card"><div class="chart-title">📊 Faculty Distribution - Minutes</div>', unsafe_allow_html=True)
+    dept = res.faculty_share
+    rec["rows_in"] = len(dept)
+    if not dept.empty:
+        st.plotly_chart(faculty_share_figure(dept), use_container_width=True)
+    else:
+        st.info("No faculty data.")
+    st.markdown(f'<div class="desc">• Faculty share limited to the top {top_n} to keep the chart readable.</div></div>', unsafe_allow_html=True)
+
+with prof.stage("chart: teaching timeline") as rec:
+    st.markdown('<div class="neon-card"><div class="chart-title">📅 Teaching Timeline - Hours per Week</div>', unsafe_allow_html=True)
+    weekly, dated_total = dated_minutes(state, source, state.version, scope)
+    rec["rows_in"] = len(weekly)
+    if weekly.any():
+        timeline = pd.DataFrame({"week": weekly.index, "hours": weekly.to_numpy() / 60})
+        st.plotly_chart(timeline_figure(timeline), use_container_width=True)
+    else:
+        st.info("No dated sessions in the selected period.")
+    st.markdown(f'<div class="desc">• Hours actually taught in each calendar week, from each session\'s class dates and day '
+                f'({dated_total / 60:,.0f} h in total). Short courses and holidays show up as dips and peaks.</div></div>',
+                unsafe_allow_html=True)
+
+st.markdown('<div class="neon-card"><div class="chart-title">⚠️ Scheduling Conflicts - Hall Double-Bookings & Instructor Clashes</div>', unsafe_allow_html=True)
+with prof.stage("panel: conflicts") as rec:
+    conflicts = filtered_conflicts(state, source, state.version, spec, filtered)
+    if not conflicts.empty:
+        conflict_table = state.conflict_table.loc[conflicts.index[:CONFLICT_ROWS_SHOWN]]
+        n_hall = int((conflicts["kind"] == "hall").sum())
+        n_inst = int((conflicts["kind"] == "instructor").sum())
+        m1, m2 = st.columns(2)
+        m1.markdown(f'<div class="kpi"><b>Hall double-bookings</b><br>{n_hall}</div>', unsafe_allow_html=True)
+        m2.markdown(f'<div class="kpi"><b>Instructor clashes</b><br>{n_inst}</div>', unsafe_allow_html=True)
+        st.dataframe(conflict_table, use_container_width=True, hide_index=True, height=260)
+        if len(conflicts) > CONFLICT_ROWS_SHOWN:
+            st.caption(f"Showing the first {CONFLICT_ROWS_SHOWN:,} of {len(conflicts):,} pairs; the CSV has all of them.")
+        st.download_button("⬇️ Download conflicts CSV", conflicts_csv(state, source, state.version, spec, filtered),
+                           "schedule_conflicts.csv", "text/csv")
+    else:
+        st.info("No overlapping sessions found.")
+    rec["rows_out"] = len(conflicts)
+st.markdown('<div class="desc">• Pairs of sessions that overlap in time in the same hall, or for the same instructor, on the same day. Cross-listed sections sharing a room show up here too.</div></div>', unsafe_allow_html=True)
+
+with prof.stage("occupancy"):
+    hall_util, time_util = hall_utilization(state, source, state.version, top_n)
+c7, c8 = st.columns(2)
+
+with c7, prof.stage("chart: hall utilization") as rec:
+    st.markdown(f'<div class="neon-card"><div class="chart-title">🏫 Hall Utilization - Share of Teaching Day (Top {top_n})</div>', unsafe_allow_html=True)
+    rec["rows_in"] = len(hall_util)
+    if not hall_util.empty:
+        st.plotly_chart(hall_utilization_figure(hall_util), use_container_width=True)
+    else:
+        st.info("No hall occupancy data.")
+    st.markdown('<div class="desc">• Share of 5-minute slots between 08:30 and 21:45 in which the hall is booked, over the days that have classes.</div></div>', unsafe_allow_html=True)
+
+with c8, prof.stage("chart: utilization by time") as rec:
+    st.markdown('<div class="neon-card"><div class="chart-title">🕒 Hall Utilization - Time of Day</div>', unsafe_allow_html=True)
+    rec["rows_in"] = len(time_util)
+    if not time_util.empty:
+        st.plotly_chart(time_utilization_figure(time_util), use_container_width=True)
+    else:
+        st.info("No hall occupancy data.")
+    st.markdown('<div class="desc">• Percentage of halls occupied at each time of day, averaged over teaching days.</div></div>', unsafe_allow_html=True)
+
+def log_profile(profiler, **context):
+    if profiler.enabled:
+        session_id = st.session_state.setdefault("session_id", uuid4().hex[:12])
+        profiler.write_log(session=session_id, **context)
+
+def profiled(fragment):
+    """Give each run of ``fragment`` its own Profiler, logged when the run finishes.
+
+    A fragment rerun skips the rest of the script, so the page's ``prof``
+    would never be logged for it.
+    """
+    @functools.wraps(fragment)
+    def run(*args, **kwargs):
+        profiler = Profiler.from_env()
+        try:
+            return fragment(*args, prof=profiler, **kwargs)
+        finally:
+            log_profile(profiler, fragment=fragment.__name__)
+            if profiler.show and profiler.records:
+                st.caption(f"🛠 {profiler.total_seconds() * 1000:.0f} ms this run")
+    return run
+
+# Widgets local to a panel live in fragments: changing them reruns only
+# that panel, not the whole page.
+@st.fragment
+@profiled
+def free_hall_finder(state, prof):
+    f1, f2, f3 = st.columns([1, 2, 1])
+    free_day = f1.selectbox("Day", days_options, index=1)
+    free_window = f2.slider("Between", time(8, 30), time(21, 45), (time(10, 0), time(14, 0)), step=timedelta(minutes=5))
+    free_duration = f3.number_input("Minutes needed", min_value=5, max_value=600, value=75, step=5)
+    with prof.stage("panel: free hall finder") as rec:
+        free = state.occupancy.free_halls(free_day,
+                                          free_window[0].hour * 60 + free_window[0].minute,
+                                          free_window[1].hour * 60 + free_window[1].minute,
+                                          free_duration)
+        if not free.empty:
+            st.dataframe(free, use_container_width=True, hide_index=True, height=260)
+        else:
+            st.info("No hall is free for that long in the chosen window.")
+        rec["rows_out"] = len(free)
+
+st.markdown('<div class="neon-card"><div class="chart-title">🔍 Free Hall Finder</div>', unsafe_allow_html=True)
+free_hall_finder(state)
+st.markdown('<div class="desc">• Halls with an unbroken free block of the requested length; earliest/latest are the feasible start times. Uses the full timetable, not the sidebar filters.</div></div>', unsafe_allow_html=True)
+
+@st.fragment
+@profiled
+def rebalance_panel(state, source, faculties, prof):
+    r1, r2, r3, r4 = st.columns([2, 1, 1, 1])
+    faculty = r1.selectbox("Faculty", faculties, key="rebalance_faculty")
+    max_moves = r2.number_input("Max moves", min_value=1, max_value=500, value=20, step=1)
+    budget = r3.number_input("Time budget (s)", min_value=0.5, max_value=30.0, value=2.0, step=0.5)
+    request = (state.version, faculty, float(budget), int(max_moves))
+    if r4.button("Propose plan", use_container_width=True):
+        st.session_state["rebalance_request"] = request
+    if st.session_state.get("rebalance_request") != request:
+        return
+    with prof.stage("panel: rebalancing") as rec:
+        plan = rebalance_plan(state, source, state.version, faculty, float(budget), int(max_moves))
+        summary = plan.summary()
+        rec["rows_out"] = summary["moves"]
+        m1, m2, m3 = st.columns(3)
+        m1.markdown(f'<div class="kpi"><b>Max load</b><br>{summary["max_before"]/60:.1f} → {summary["max_after"]/60:.1f} h/week</div>', unsafe_allow_html=True)
+        m2.markdown(f'<div class="kpi"><b>Load spread (std)</b><br>{summary["std_before"]/60:.1f} → {summary["std_after"]/60:.1f} h</div>', unsafe_allow_html=True)
+        m3.markdown(f'<div class="kpi"><b>Sections moved</b><br>{summary["moves"]}</div>', unsafe_allow_html=True)
+        if plan.moves.empty:
+            st.info("No clash-free move lowers this faculty's load spread.")
+            return
+        loads = pd.concat([
+            pd.DataFrame({"plan": "Before", "instructor": plan.before.index, "hours": plan.before.to_numpy() / 60}),
+            pd.DataFrame({"plan": "After", "instructor": plan.after.index, "hours": plan.after.to_numpy() / 60}),
+        ], ignore_index=True)
+        st.plotly_chart(load_distribution_figure(loads), use_container_width=True)
+        st.dataframe(plan.moves, use_container_width=True, hide_index=True, height=260)
+        if not summary["converged"]:
+            st.caption("Stopped at the move limit or time budget; a larger budget may balance further.")
+        st.download_button("⬇️ Download plan CSV", plan.moves.to_csv(index=False).encode("utf-8"),
+                           "rebalancing_plan.csv", "text/csv")
+
+st.markdown('<div class="neon-card"><div class="chart-title">⚖️ Workload Rebalancing - Proposed Section Moves</div>', unsafe_allow_html=True)
+rebalance_panel(state, source, faculties)
+st.markdown('<div class="desc">• Moves whole sections between instructors of one faculty to bring the heaviest loads and the spread down. A section only goes to an instructor with no overlapping session on its days. Weekly minutes across all faculties count as load; uses the full timetable, not the sidebar filters.</div></div>', unsafe_allow_html=True)
 
 with st.expander("Tips & UX — How to read this dashboard"):
     st.markdown("""
 - Leave filters empty to view global statistics.
-- Top 10 limit is applied to reduce overlap and keep visualizations legible.
+- Rankings show the top 10 by default; change it with **Top N** in the sidebar (up to 200, also used by the Excel export).
 - Heatmap uses hour bins (1h) to show student flow peaks.
 - Sunburst is intentionally limited so labels remain readable.
 """)
@@ -532,5 +727,25 @@ st.markdown('</div>', unsafe_allow_html=True)
 
 st.markdown("<div style='color:#ffffff;font-size:13px'>Hover on any element to see exact counts/minutes. Download filtered data below.</div>", unsafe_allow_html=True)
 
-csv = df_f.to_csv(index=False).encode("utf-8")
-st.download_button("⬇️ Download filtered CSV", csv, "filtered_schedule_filtered.csv", "text/csv")
+@st.fragment
+@profiled
+def export_panel(state, source, spec, top_n, n_rows, prof):
+    e1, e2 = st.columns([3, 1])
+    export_fmt = e1.selectbox("Export format", list(EXPORT_FORMATS), label_visibility="collapsed")
+    if e2.button("Prepare download", use_container_width=True):
+        st.session_state["export_request"] = (state.version, spec, export_fmt, top_n)
+    if st.session_state.get("export_request") == (state.version, spec, export_fmt, top_n):
+        with prof.stage("export", rows_in=n_rows) as rec:
+            file_name, mime = EXPORT_FORMATS[export_fmt]
+            data = export_filtered(state, source, state.version, spec, export_fmt, top_n)
+            rec["rows_out"] = len(data)
+        label = "⬇️ Download filtered CSV" if export_fmt == "CSV" else f"⬇️ Download {export_fmt}"
+        st.download_button(label, data, file_name, mime)
+
+export_panel(state, source, spec, top_n, len(rows))
+
+log_profile(prof, spec=spec._asdict())
+if prof.show:
+    with st.expander(f"🛠 Diagnostics — {prof.total_seconds() * 1000:.0f} ms this rerun"):
+        st.dataframe(prof.frame(), use_container_width=True, hide_index=True)
+        st.caption(f"Analytics cache: {engine.stats()}")